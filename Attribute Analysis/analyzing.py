@@ -1,18 +1,28 @@
-from collections import defaultdict
-from pandas import isnull
+from itertools import islice
+import numpy as np
+import pandas as pd
+from results import BusinessRuleResultStore
+from rules import verdict_cache
 
 class AttributeAnalysis:
 
-    def __init__(self, attribute_name, data_frame, dropna=True):
+    def __init__(self, attribute_name, data_source, dropna=True, max_listed_values=None):
         self.attribute_name = attribute_name
-        self.data_frame = data_frame
+        self.data_source = data_source
         self.indicators = []
+        self.analyzed_indicators = []
         self.dropna = dropna
+        # Only the most frequent invalid values are listed in the reports (None = all)
+        self.max_listed_values = max_listed_values
         self.business_rules = []
+        self.business_rules_result_store = None
         self.business_rules_results = {}
+        self.index_values_prepared = False
 
-    def add_indicator(self, indicator):
+    def add_indicator(self, indicator, analyzed=False):
         self.indicators.append(indicator)
+        if analyzed:
+            self.analyzed_indicators.append(indicator)
 
     def add_business_rule(self, business_rule):
         self.business_rules.append(business_rule)
@@ -25,57 +35,82 @@ class AttributeAnalysis:
     def run_indicator_analysis(self):
         print("     Run Indicator Analysis...")
         for indicator in self.indicators:
+            if indicator in self.analyzed_indicators:
+                print("          {} (reused)".format(indicator.__class__.__name__))
+                continue
             print("          {}".format(indicator.__class__.__name__))
             indicator.analyze()
+            self.analyzed_indicators.append(indicator)
 
     def run_business_rules_analysis(self):
         print("     Run Business-Rule Analysis...")
-        for value, count in self.data_frame[self.attribute_name].value_counts(dropna=False).items():
-            data_sets = (
-                self.data_frame[self.data_frame[self.attribute_name] == value] if not isnull(value)
-                else self.data_frame[self.data_frame[self.attribute_name].isnull()]
-            )
-            if self.dropna and value.isnull():
-                continue
-            result, valid = self.__validate_data_set(value, count, data_sets)
-            if valid:
-                self.__append_businss_rule_result(valid, 'overall', count, value, result, data_sets)
-            else:
-                self.__append_businss_rule_result(valid, 'overall', count, value, result, data_sets)
+        value_counts = self.data_source.get_value_counts(self.attribute_name, dropna=False)
+        if self.dropna:
+            value_counts = value_counts[value_counts.index.notnull()]
+        # Each rule is evaluated once per distinct value, the rows of a value are only looked up when rendered
+        self.business_rules_result_store = BusinessRuleResultStore(
+            value_counts.index, value_counts.values, self.business_rules, [
+                verdict_cache.get_verdicts(business_rule, value_counts.index) for business_rule in self.business_rules
+            ]
+        )
+        self.business_rules_results = self.business_rules_result_store.get_business_rules_results()
+        self.index_values_prepared = False
 
-    def __validate_data_set(self, value, count, data_sets):
-        results = {}
-        all_rules_valid = True
-        for business_rule in self.business_rules:
-            rule_valid = business_rule.is_valid(value)
-            if not rule_valid:
-                all_rules_valid = False
-            results[business_rule] = business_rule.is_valid(value)
-            self.__append_businss_rule_result(rule_valid, business_rule.__class__.__name__, count, value, results[business_rule], data_sets)
-        return results, all_rules_valid
+    def get_index_values(self, value):
+        if not self.index_values_prepared:
+            self.data_source.prepare_index_values(self.attribute_name, self.get_listed_values())
+            self.index_values_prepared = True
+        return self.data_source.get_index_values(self.attribute_name, value)
 
-    def __append_businss_rule_result(self, valid, business_rule, count, value, result, data_sets):
-        validity = 'valid' if valid else 'invalid'
-        self.__create_initial_business_rule_results_if_not_existing(business_rule)
-        self.business_rules_results[validity][business_rule]['count'] = (
-            self.business_rules_results[validity][business_rule]['count'] + count
-        )
-        if 'values' not in self.business_rules_results[validity][business_rule]:
-            self.business_rules_results[validity][business_rule]['values'] = {}
-        self.business_rules_results[validity][business_rule]['values'][value] = {}
-        self.business_rules_results[validity][business_rule]['values'][value]['result'] = result
-        self.business_rules_results[validity][business_rule]['values'][value]['count'] = count
-        self.business_rules_results[validity][business_rule]['values'][value]['data_sets'] = data_sets
+    def get_listed_values(self):
+        """The invalid values listed in the reports, the most frequent ones of every business rule"""
+        listed_values = []
+        for business_rule_results in self.business_rules_results.get('invalid', {}).values():
+            if 'values' in business_rule_results:
+                listed_values.extend(islice(business_rule_results['values'], self.max_listed_values))
+        return listed_values
+
+    def get_result(self):
+        """Indicator results and rule verdicts as plain, JSON serializable data"""
+        return {
+            'attribute_name': self.attribute_name,
+            'number_of_rows': get_plain_value(self.data_source.get_number_of_rows()),
+            'indicators': [
+                {
+                    'indicator_name': indicator.__class__.__name__,
+                    'name': indicator.name,
+                    'result': get_plain_value(indicator.get_result())
+                }
+                for indicator in self.indicators
+            ],
+            'business_rules': {
+                validity: {
+                    business_rule: {
+                        'count': get_plain_value(business_rule_results['count']),
+                        'values': [
+                            {'value': get_plain_value(value), 'count': get_plain_value(value_result['count'])}
+                            for value, value_result in (
+                                business_rule_results['values'].get_top_items(self.max_listed_values)
+                                if 'values' in business_rule_results else []
+                            )
+                        ]
+                    }
+                    for business_rule, business_rule_results in validity_results.items()
+                }
+                for validity, validity_results in self.business_rules_results.items()
+            }
+        }
 
-    def __create_initial_business_rule_results_if_not_existing(self, business_rule):
-        if 'valid' not in self.business_rules_results:
-            self.business_rules_results['valid'] = {}
-        if business_rule not in self.business_rules_results['valid']:
-            self.business_rules_results['valid'][business_rule] = {}
-            self.business_rules_results['valid'][business_rule]['count'] = 0
 
-        if 'invalid' not in self.business_rules_results:
-            self.business_rules_results['invalid'] = {}
-        if business_rule not in self.business_rules_results['invalid']:
-            self.business_rules_results['invalid'][business_rule] = {}
-            self.business_rules_results['invalid'][business_rule]['count'] = 0
+def get_plain_value(value):
+    if isinstance(value, pd.Series):
+        return [[get_plain_value(index), get_plain_value(item)] for index, item in value.items()]
+    if isinstance(value, dict):
+        return {str(get_plain_value(key)): get_plain_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [get_plain_value(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
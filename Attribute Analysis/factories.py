@@ -1,8 +1,13 @@
 from abc import ABC, abstractmethod
+import glob
+import json
 from analyzing import AttributeAnalysis
 from indicators import *
+from loaders import *
 from rules import *
 from renderer import *
+from sources import *
+from states import *
 
 
 #-------------------------------- Attribute Analysis Factories --------------------------------------
@@ -17,23 +22,34 @@ class AttributeAnalysisFactory(ABC):
 
 class AttributeAnalysisJSONFactory(AttributeAnalysisFactory):
 
-    def __init__(self, json_data, data_frame):
+    def __init__(self, json_data, data_source, indicator_cache=None):
         self.json_data = json_data
-        self.data_frame = data_frame
+        self.data_source = data_source
         self.attribute_name = self.json_data['attribute_name']
         self.dropna = self.json_data['dropna']
+        self.max_listed_values = self.json_data.get('max_listed_values')
+        # Indicators by their settings block, an unchanged block reuses the indicator and its result
+        self.previous_indicator_cache = indicator_cache or {}
+        self.indicator_cache = {}
 
     def create(self):
-        attribute_analysis = AttributeAnalysis(self.attribute_name, self.data_frame, dropna=self.dropna)
+        attribute_analysis = AttributeAnalysis(
+            self.attribute_name, self.data_source, dropna=self.dropna, max_listed_values=self.max_listed_values
+        )
         attribute_analysis = self.__append_indicators(attribute_analysis, self.json_data['indicators'])
         attribute_analysis = self.__append_business_rules(attribute_analysis, self.json_data['business_rules'])
         return attribute_analysis
 
     def __append_indicators(self, attribute_analysis, json_indicators_data):
         for json_indicator_data in json_indicators_data:
-            attribute_analysis.add_indicator(
-                self.__create_indicator(json_indicator_data)
-            )
+            key = (self.attribute_name, json.dumps(json_indicator_data, sort_keys=True))
+            if key in self.previous_indicator_cache and key not in self.indicator_cache:
+                self.indicator_cache[key] = self.previous_indicator_cache[key]
+                attribute_analysis.add_indicator(self.indicator_cache[key], analyzed=True)
+            else:
+                indicator = self.__create_indicator(json_indicator_data)
+                self.indicator_cache.setdefault(key, indicator)
+                attribute_analysis.add_indicator(indicator)
         return attribute_analysis
 
     def __append_business_rules(self, attribute_analysis, json_business_rules_data):
@@ -44,7 +60,7 @@ class AttributeAnalysisJSONFactory(AttributeAnalysisFactory):
         return attribute_analysis
 
     def __create_indicator(self, json_indicator_data):
-        return IndicatorJSONFactory(json_indicator_data, self.data_frame, self.attribute_name).create()
+        return IndicatorJSONFactory(json_indicator_data, self.data_source, self.attribute_name).create()
 
     def __create_business_rule(self, json_business_rule_data):
         return BusinessRuleJSONFactory(json_business_rule_data).create()
@@ -60,9 +76,9 @@ class IndicatorFactory(ABC):
 
 class IndicatorJSONFactory(IndicatorFactory):
 
-    def __init__(self, json_data, data_frame, attribute_name):
+    def __init__(self, json_data, data_source, attribute_name):
         self.json_data = json_data
-        self.data_frame = data_frame
+        self.data_source = data_source
         self.attribute_name = attribute_name
 
     def create(self):
@@ -77,21 +93,21 @@ class IndicatorJSONFactory(IndicatorFactory):
 
         return indicator_factories[self.json_data['indicator_name']](
             self.json_data,
-            self.data_frame,
+            self.data_source,
             self.attribute_name
         ).create()
 
 
 class SimilarValuesIndicatorFactory(ABC):
 
-    def __init__(self, data_frame, attribute_name, min_ratio):
-        self.data_frame = data_frame
+    def __init__(self, data_source, attribute_name, min_ratio):
+        self.data_source = data_source
         self.attribute_name = attribute_name
         self.min_ratio = min_ratio
 
     def create(self):
         return SimilarValuesIndicator(
-            data_frame=self.data_frame,
+            data_source=self.data_source,
             attribute_name=self.attribute_name,
             min_ratio=self.min_ratio
         )
@@ -99,14 +115,14 @@ class SimilarValuesIndicatorFactory(ABC):
 
 class SimilarValuesIndicatorJSONFactory(SimilarValuesIndicatorFactory):
 
-    def __init__(self, json_data, data_frame, attribute_name):
+    def __init__(self, json_data, data_source, attribute_name):
         self.json_data = json_data
-        self.data_frame = data_frame
+        self.data_source = data_source
         self.attribute_name = attribute_name
 
     def create(self):
         super(SimilarValuesIndicatorJSONFactory, self).__init__(
-            self.data_frame,
+            self.data_source,
             self.attribute_name,
             self.json_data['indicator_config']['min_ratio']
         )
@@ -115,27 +131,27 @@ class SimilarValuesIndicatorJSONFactory(SimilarValuesIndicatorFactory):
 
 class NullValuesIndicatorFactory(ABC):
 
-    def __init__(self, data_frame, attribute_name):
-        self.data_frame = data_frame
+    def __init__(self, data_source, attribute_name):
+        self.data_source = data_source
         self.attribute_name = attribute_name
 
     def create(self):
         return NullValuesIndicator(
-            data_frame=self.data_frame,
+            data_source=self.data_source,
             attribute_name=self.attribute_name
         )
 
 
 class NullValuesIndicatorJSONFactory(NullValuesIndicatorFactory):
 
-    def __init__(self, json_data, data_frame, attribute_name):
+    def __init__(self, json_data, data_source, attribute_name):
         self.json_data = json_data
-        self.data_frame = data_frame
+        self.data_source = data_source
         self.attribute_name = attribute_name
 
     def create(self):
         super(NullValuesIndicatorJSONFactory, self).__init__(
-            self.data_frame,
+            self.data_source,
             self.attribute_name
         )
         return super(NullValuesIndicatorJSONFactory, self).create()
@@ -143,27 +159,27 @@ class NullValuesIndicatorJSONFactory(NullValuesIndicatorFactory):
 
 class DistinctValuesIndicatorFactory(ABC):
 
-    def __init__(self, data_frame, attribute_name):
-        self.data_frame = data_frame
+    def __init__(self, data_source, attribute_name):
+        self.data_source = data_source
         self.attribute_name = attribute_name
 
     def create(self):
         return DistinctValuesIndicator(
-            data_frame=self.data_frame,
+            data_source=self.data_source,
             attribute_name=self.attribute_name
         )
 
 
 class DistinctValuesIndicatorJSONFactory(DistinctValuesIndicatorFactory):
 
-    def __init__(self, json_data, data_frame, attribute_name):
+    def __init__(self, json_data, data_source, attribute_name):
         self.json_data = json_data
-        self.data_frame = data_frame
+        self.data_source = data_source
         self.attribute_name = attribute_name
 
     def create(self):
         super(DistinctValuesIndicatorJSONFactory, self).__init__(
-            self.data_frame,
+            self.data_source,
             self.attribute_name
         )
         return super(DistinctValuesIndicatorJSONFactory, self).create()
@@ -171,27 +187,27 @@ class DistinctValuesIndicatorJSONFactory(DistinctValuesIndicatorFactory):
 
 class ValueRangeIndicatorFactory(ABC):
 
-    def __init__(self, data_frame, attribute_name):
-        self.data_frame = data_frame
+    def __init__(self, data_source, attribute_name):
+        self.data_source = data_source
         self.attribute_name = attribute_name
 
     def create(self):
         return ValueRangeIndicator(
-            data_frame=self.data_frame,
+            data_source=self.data_source,
             attribute_name=self.attribute_name
         )
 
 
 class ValueRangeIndicatorJSONFactory(ValueRangeIndicatorFactory):
 
-    def __init__(self, json_data, data_frame, attribute_name):
+    def __init__(self, json_data, data_source, attribute_name):
         self.json_data = json_data
-        self.data_frame = data_frame
+        self.data_source = data_source
         self.attribute_name = attribute_name
 
     def create(self):
         super(ValueRangeIndicatorJSONFactory, self).__init__(
-            self.data_frame,
+            self.data_source,
             self.attribute_name
         )
         return super(ValueRangeIndicatorJSONFactory, self).create()
@@ -199,27 +215,27 @@ class ValueRangeIndicatorJSONFactory(ValueRangeIndicatorFactory):
 
 class PatternFrequencyIndicatorFactory(ABC):
 
-    def __init__(self, data_frame, attribute_name):
-        self.data_frame = data_frame
+    def __init__(self, data_source, attribute_name):
+        self.data_source = data_source
         self.attribute_name = attribute_name
 
     def create(self):
         return PatternFrequencyIndicator(
-            data_frame=self.data_frame,
+            data_source=self.data_source,
             attribute_name=self.attribute_name
         )
 
 
 class PatternFrequencyIndicatorJSONFactory(PatternFrequencyIndicatorFactory):
 
-    def __init__(self, json_data, data_frame, attribute_name):
+    def __init__(self, json_data, data_source, attribute_name):
         self.json_data = json_data
-        self.data_frame = data_frame
+        self.data_source = data_source
         self.attribute_name = attribute_name
 
     def create(self):
         super(PatternFrequencyIndicatorJSONFactory, self).__init__(
-            self.data_frame,
+            self.data_source,
             self.attribute_name
         )
         return super(PatternFrequencyIndicatorJSONFactory, self).create()
@@ -227,15 +243,15 @@ class PatternFrequencyIndicatorJSONFactory(PatternFrequencyIndicatorFactory):
 
 class ShortestValuesIndicatorFactory(ABC):
 
-    def __init__(self, data_frame, attribute_name, number_of_values, dropna):
-        self.data_frame = data_frame
+    def __init__(self, data_source, attribute_name, number_of_values, dropna):
+        self.data_source = data_source
         self.attribute_name = attribute_name
         self.number_of_values = number_of_values
         self.dropna = dropna
 
     def create(self):
         return ShortestValuesIndicator(
-            data_frame=self.data_frame,
+            data_source=self.data_source,
             attribute_name=self.attribute_name,
             number_of_values=self.number_of_values,
             dropna=self.dropna
@@ -244,9 +260,9 @@ class ShortestValuesIndicatorFactory(ABC):
 
 class ShortestValuesIndicatorJSONFactory(ShortestValuesIndicatorFactory):
 
-    def __init__(self, json_data, data_frame, attribute_name):
+    def __init__(self, json_data, data_source, attribute_name):
         super(ShortestValuesIndicatorJSONFactory, self).__init__(
-            data_frame,
+            data_source,
             attribute_name,
             json_data['indicator_config']['number_of_values'],
             json_data['indicator_config']['dropna']
@@ -568,3 +584,137 @@ class IndicatorHTMLRendererFactory(IndicatorRendererFactory):
         }
 
         return indicator_html_renderer.get(type(self.indicator))(self.indicator)
+
+
+#------------------------------ Data Frame Loader Factories --------------------------------------
+
+class DataFrameLoaderFactory(ABC):
+
+    @abstractmethod
+    def create(self):
+        pass
+
+
+class DataFrameLoaderSettingsFactory(DataFrameLoaderFactory):
+
+    def __init__(self, file_path, file_format, index_name, encoding, separator, columns=None,
+                 compact=False, max_category_ratio=0.5, snapshot_directory=None, snapshot_format="pickle",
+                 number_of_workers=1, chunk_size=64 * 1024 * 1024, source_file_column="SourceFile"):
+        self.file_path = file_path
+        self.file_format = file_format
+        self.index_name = index_name
+        self.encoding = encoding
+        self.separator = separator
+        self.columns = columns
+        self.compactor = DataFrameCompactor(max_category_ratio, [index_name]) if compact else None
+        self.snapshot_directory = snapshot_directory
+        self.snapshot_format = snapshot_format
+        self.number_of_workers = number_of_workers
+        self.chunk_size = chunk_size
+        self.source_file_column = source_file_column
+
+    def create(self):
+        data_frame_loader = self.__create_data_frame_loader()
+        if self.snapshot_directory:
+            return SnapshotDataFrameLoader(data_frame_loader, self.snapshot_directory, self.snapshot_format)
+        return data_frame_loader
+
+    def __create_data_frame_loader(self):
+        if self.file_format == 'csv' and glob.has_magic(self.file_path):
+            return MultiFileCSVDataFrameLoader(
+                self.file_path, self.index_name, self.encoding, self.separator, self.columns, self.compactor,
+                self.number_of_workers, self.source_file_column
+            )
+        if self.file_format == 'csv' and self.number_of_workers > 1:
+            return ParallelCSVDataFrameLoader(
+                self.file_path, self.index_name, self.encoding, self.separator, self.columns, self.compactor,
+                self.number_of_workers, self.chunk_size
+            )
+        if self.file_format == 'csv':
+            return CSVDataFrameLoader(
+                self.file_path, self.index_name, self.encoding, self.separator, self.columns, self.compactor
+            )
+
+        data_frame_loaders = {
+            'parquet' : ParquetDataFrameLoader,
+            'feather' : FeatherDataFrameLoader
+        }
+
+        return data_frame_loaders[self.file_format](self.file_path, self.index_name, self.columns, self.compactor)
+
+
+#------------------------------ Data Source Factories ----------------------------------
+
+class DataSourceFactory(ABC):
+
+    @abstractmethod
+    def create(self):
+        pass
+
+
+class DataSourceSettingsFactory(DataSourceFactory):
+
+    def __init__(self, file_path, file_format, index_name, table_name, data_frame_loader_factory,
+                 chunked_csv_profiler_factory=None):
+        self.file_path = file_path
+        self.file_format = file_format
+        self.index_name = index_name
+        self.table_name = table_name
+        self.data_frame_loader_factory = data_frame_loader_factory
+        self.chunked_csv_profiler_factory = chunked_csv_profiler_factory
+
+    def create(self):
+        if self.file_format == 'sqlite':
+            return SQLiteDataSource(self.file_path, self.table_name, self.index_name)
+        if self.file_format == 'csv' and self.chunked_csv_profiler_factory:
+            return StateDataSource(self.chunked_csv_profiler_factory.create().profile())
+        return DataFrameDataSource(self.data_frame_loader_factory.create().load(), self.index_name)
+
+
+#------------------------------ Chunked CSV Profiler Factories ----------------------------------
+
+class ChunkedCSVProfilerFactory(ABC):
+
+    @abstractmethod
+    def create(self):
+        pass
+
+
+class ChunkedCSVProfilerSettingsFactory(ChunkedCSVProfilerFactory):
+
+    def __init__(self, file_path, index_name, json_datas, encoding, separator, chunk_size=None, state_file_path=None):
+        self.file_path = file_path
+        self.index_name = index_name
+        self.json_datas = json_datas
+        self.encoding = encoding
+        self.separator = separator
+        self.chunk_size = chunk_size or 500000
+        self.state_file_path = state_file_path
+
+    def create(self):
+        if glob.has_magic(self.file_path):
+            return MultiFileChunkedCSVProfiler([
+                self.__create_chunked_csv_profiler(file_path, None) for file_path in sorted(glob.glob(self.file_path))
+            ])
+        return self.__create_chunked_csv_profiler(self.file_path, self.state_file_path)
+
+    def get_state_key(self):
+        # Profile states hold rule verdicts, they are only reused for the same attributes and rules
+        return json.dumps(sorted(
+            [json_data['attribute_name'], json_data['business_rules']] for json_data in self.json_datas
+        ), sort_keys=True)
+
+    def __create_chunked_csv_profiler(self, file_path, state_file_path):
+        return ChunkedCSVProfiler(
+            file_path, self.index_name, self.__create_business_rules(), self.encoding, self.separator,
+            self.chunk_size, state_file_path, self.get_state_key()
+        )
+
+    def __create_business_rules(self):
+        business_rules = {}
+        for json_data in self.json_datas:
+            business_rules.setdefault(json_data['attribute_name'], []).extend(
+                BusinessRuleJSONFactory(json_business_rule_data).create()
+                for json_business_rule_data in json_data['business_rules']
+            )
+        return business_rules
@@ -4,8 +4,8 @@ import operator
 
 class Indicator(ABC):
 
-    def __init__(self, data_frame=None, attribute_name=None):
-        self.data_frame = data_frame
+    def __init__(self, data_source=None, attribute_name=None):
+        self.data_source = data_source
         self.attribute_name = attribute_name
         self.name = ""
 
@@ -20,10 +20,10 @@ class Indicator(ABC):
 
 class SimilarValuesIndicator(Indicator):
 
-    def __init__(self, data_frame=None, attribute_name=None, min_ratio=0.9):
-        super(SimilarValuesIndicator, self).__init__(data_frame=data_frame, attribute_name=attribute_name)
+    def __init__(self, data_source=None, attribute_name=None, min_ratio=0.9):
+        super(SimilarValuesIndicator, self).__init__(data_source=data_source, attribute_name=attribute_name)
         self.min_ratio = min_ratio
-        self.value_counts = self.data_frame[self.attribute_name].value_counts(dropna=True)
+        self.value_counts = self.data_source.get_value_counts(self.attribute_name, dropna=True)
         self.matching_value_count_groups = []
         self.name = "Ähnliche Werte"
 
@@ -53,13 +53,13 @@ class SimilarValuesIndicator(Indicator):
 
 
 class NullValuesIndicator(Indicator):
-    def __init__(self, data_frame=None, attribute_name=None):
-        super(NullValuesIndicator, self).__init__(data_frame=data_frame, attribute_name=attribute_name)
+    def __init__(self, data_source=None, attribute_name=None):
+        super(NullValuesIndicator, self).__init__(data_source=data_source, attribute_name=attribute_name)
         self.name = "Fehlende Werte"
 
     def analyze(self):
-        values_total = self.data_frame.shape[0]
-        missing_values_total = self.data_frame[self.attribute_name].isnull().sum()
+        values_total = self.data_source.get_number_of_rows()
+        missing_values_total = self.data_source.get_null_count(self.attribute_name)
         available_values_total = values_total - missing_values_total
         missing_values_percentage = missing_values_total / values_total * 100
         available_values_percentage = available_values_total / values_total * 100
@@ -77,16 +77,15 @@ class NullValuesIndicator(Indicator):
 
 class DistinctValuesIndicator(Indicator):
 
-    def __init__(self, data_frame=None, attribute_name=None):
-        super(DistinctValuesIndicator, self).__init__(data_frame=data_frame, attribute_name=attribute_name)
+    def __init__(self, data_source=None, attribute_name=None):
+        super(DistinctValuesIndicator, self).__init__(data_source=data_source, attribute_name=attribute_name)
         self.name = "Unterschiedliche Werte"
 
     def analyze(self):
-        distinct_values_total = self.data_frame.groupby(self.attribute_name)[self.attribute_name].nunique(dropna=False).sum()
-        unique_values_total = self.data_frame.groupby(self.attribute_name).filter(
-            lambda g: (g[self.attribute_name].size == 1)).shape[0]
-        duplicate_values_total = self.data_frame.groupby(self.attribute_name).filter(
-            lambda g: (g[self.attribute_name].size >= 2))[self.attribute_name].nunique()
+        value_counts = self.data_source.get_value_counts(self.attribute_name, dropna=True)
+        distinct_values_total = len(value_counts)
+        unique_values_total = int((value_counts == 1).sum())
+        duplicate_values_total = int((value_counts >= 2).sum())
         unique_values_percentage = round((unique_values_total / distinct_values_total) * 100, 2)
         duplicate_values_percentage = round((duplicate_values_total / distinct_values_total) * 100, 2)
         self.result = {
@@ -103,12 +102,12 @@ class DistinctValuesIndicator(Indicator):
 
 class ValueRangeIndicator(Indicator):
 
-    def __init__(self, data_frame=None, attribute_name=None):
-        super(ValueRangeIndicator, self).__init__(data_frame=data_frame, attribute_name=attribute_name)
+    def __init__(self, data_source=None, attribute_name=None):
+        super(ValueRangeIndicator, self).__init__(data_source=data_source, attribute_name=attribute_name)
         self.name = "Wertebereich / Wertemenge"
 
     def analyze(self):
-        self.result = self.data_frame[self.attribute_name].value_counts(dropna=False)
+        self.result = self.data_source.get_value_counts(self.attribute_name, dropna=False)
 
     def get_result(self):
         return self.result
@@ -116,14 +115,14 @@ class ValueRangeIndicator(Indicator):
 
 class PatternFrequencyIndicator(Indicator):
 
-    def __init__(self, data_frame=None, attribute_name=None):
-        super(PatternFrequencyIndicator, self).__init__(data_frame=data_frame, attribute_name=attribute_name)
+    def __init__(self, data_source=None, attribute_name=None):
+        super(PatternFrequencyIndicator, self).__init__(data_source=data_source, attribute_name=attribute_name)
         self.name = "Muster Frequenz"
         self.result = {}
 
     def analyze(self):
-        for value, cnt in self.data_frame[self.attribute_name].value_counts().iteritems():
-            value_pattern = self.__get_value_pattern(str(value))
+        for value, cnt in self.data_source.get_value_counts(self.attribute_name).iteritems():
+            value_pattern = get_value_pattern(str(value))
             if value_pattern in self.result:
                 self.result[value_pattern] += cnt
             else:
@@ -131,34 +130,21 @@ class PatternFrequencyIndicator(Indicator):
 
         self.sorted_result_tuple = sorted(self.result.items(), key=operator.itemgetter(1))
 
-    def __get_value_pattern(self, value):
-        value_pattern = ''
-        for char in value:
-            if char.istitle():
-                value_pattern += 'A'
-            elif char.isalpha():
-                value_pattern += 'a'
-            elif char.isdigit():
-                value_pattern += '9'
-            else:
-                value_pattern += char
-        return value_pattern
-
     def get_result(self):
         return self.sorted_result_tuple
 
 
 class ShortestValuesIndicator(Indicator):
 
-    def __init__(self, data_frame=None, attribute_name=None, number_of_values=100, dropna=True):
-        super(ShortestValuesIndicator, self).__init__(data_frame=data_frame, attribute_name=attribute_name)
+    def __init__(self, data_source=None, attribute_name=None, number_of_values=100, dropna=True):
+        super(ShortestValuesIndicator, self).__init__(data_source=data_source, attribute_name=attribute_name)
         self.number_of_values=number_of_values
         self.dropna=dropna
         self.name = "Kürzeste Werte"
         self.shortest_values = []
 
     def analyze(self):
-        for value, count in self.data_frame[self.attribute_name].value_counts(dropna=self.dropna).items():
+        for value, count in self.data_source.get_value_counts(self.attribute_name, dropna=self.dropna).items():
             length = len(str(value))
             self.shortest_values.append((value, length, count))
 
@@ -166,4 +152,18 @@ class ShortestValuesIndicator(Indicator):
         self.shortest_values = self.shortest_values[0:100] if len(self.shortest_values) >= 100 else self.shortest_values
 
     def get_result(self):
-        return self.shortest_values
\ No newline at end of file
+        return self.shortest_values
+
+
+def get_value_pattern(value):
+    value_pattern = ''
+    for char in value:
+        if char.istitle():
+            value_pattern += 'A'
+        elif char.isalpha():
+            value_pattern += 'a'
+        elif char.isdigit():
+            value_pattern += '9'
+        else:
+            value_pattern += char
+    return value_pattern
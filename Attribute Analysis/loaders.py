@@ -0,0 +1,476 @@
+from abc import ABC, abstractmethod
+from itertools import starmap
+from multiprocessing import Pool
+import codecs
+import glob
+import hashlib
+import io
+import json
+import os
+import re
+import warnings
+import numpy as np
+import pandas as pd
+
+COMPRESSED_FILE_EXTENSIONS = ('.gz', '.bz2', '.zip', '.xz', '.zst')
+
+
+class DataFrameLoader(ABC):
+
+    def __init__(self, file_path, index_name, columns=None, compactor=None):
+        self.file_path = file_path
+        self.index_name = index_name
+        self.columns = columns
+        self.compactor = compactor
+
+    def load(self):
+        data_frame = self.read()
+        if self.compactor:
+            data_frame = self.compactor.compact(data_frame)
+        data_frame.set_index(self.index_name, inplace=True, drop=False)
+        return data_frame
+
+    @abstractmethod
+    def read(self):
+        pass
+
+    def get_source_file_paths(self):
+        return [self.file_path]
+
+    def get_options(self):
+        return {
+            'loader' : self.__class__.__name__,
+            'index_name' : self.index_name,
+            'columns' : self.columns,
+            'compactor' : self.compactor.get_options() if self.compactor else None
+        }
+
+
+class CSVDataFrameLoader(DataFrameLoader):
+
+    def __init__(self, file_path, index_name, encoding="utf-8", separator=";", columns=None, compactor=None):
+        super(CSVDataFrameLoader, self).__init__(file_path, index_name, columns, compactor)
+        self.encoding = encoding
+        self.separator = separator
+
+    def read(self):
+        return pd.read_csv(self.file_path, encoding=self.encoding, sep=self.separator, usecols=self.columns)
+
+    def get_options(self):
+        options = super(CSVDataFrameLoader, self).get_options()
+        options.update({'encoding' : self.encoding, 'separator' : self.separator})
+        return options
+
+
+class ParallelCSVDataFrameLoader(CSVDataFrameLoader):
+
+    def __init__(self, file_path, index_name, encoding="utf-8", separator=";", columns=None, compactor=None,
+                 number_of_workers=os.cpu_count() or 1, chunk_size=64 * 1024 * 1024):
+        super(ParallelCSVDataFrameLoader, self).__init__(file_path, index_name, encoding, separator, columns, compactor)
+        self.number_of_workers = number_of_workers
+        self.chunk_size = chunk_size
+
+    def read(self):
+        codec, bom_length, code_unit = detect_csv_codec(self.file_path, self.encoding)
+        if code_unit is None:
+            return super(ParallelCSVDataFrameLoader, self).read()
+        separator_code = get_csv_separator_code(self.separator, codec, code_unit)
+        if separator_code is None:
+            return super(ParallelCSVDataFrameLoader, self).read()
+        names = list(pd.read_csv(self.file_path, encoding=self.encoding, sep=self.separator, nrows=0).columns)
+        row_ranges = split_into_csv_row_ranges(self.file_path, bom_length, code_unit, self.chunk_size, separator_code)
+        if len(row_ranges) < 2 or self.number_of_workers <= 1:
+            return super(ParallelCSVDataFrameLoader, self).read()
+        # The first range starts with the header row
+        arguments = [
+            (self.file_path, start, end, codec, self.separator, names, self.columns, index == 0, None)
+            for index, (start, end) in enumerate(row_ranges)
+        ]
+        with Pool(min(self.number_of_workers, len(arguments))) as pool:
+            return concat_data_frames(read_consistent_data_frames(pool, read_csv_range, arguments))
+
+def detect_csv_codec(file_path, encoding):
+    """Returns the codec, the BOM length and the numpy code unit to split on, None if the file can't be split"""
+    codec = codecs.lookup(encoding).name
+    if os.path.splitext(file_path)[1].lower() in COMPRESSED_FILE_EXTENSIONS:
+        return codec, 0, None
+    with open(file_path, 'rb') as csv_file:
+        bom = csv_file.read(3)
+    if codec == 'utf-16':
+        if bom.startswith(codecs.BOM_UTF16_LE):
+            return 'utf-16-le', 2, '<u2'
+        if bom.startswith(codecs.BOM_UTF16_BE):
+            return 'utf-16-be', 2, '>u2'
+        return codec, 0, None
+    if codec in ('utf-16-le', 'utf-16-be'):
+        return codec, 0, '<u2' if codec == 'utf-16-le' else '>u2'
+    if codec in ('utf-8', 'utf-8-sig'):
+        return 'utf-8', len(codecs.BOM_UTF8) if bom == codecs.BOM_UTF8 else 0, 'u1'
+    # Other multi byte encodings can not be split on single code units
+    if codec.startswith('utf-32') or len('\n'.encode(codec)) != 1:
+        return codec, 0, None
+    return codec, 0, 'u1'
+
+
+def get_csv_separator_code(separator, codec, code_unit):
+    """The code unit of the separator, None if it is not a single code unit (the file is then not split)"""
+    separator_units = np.frombuffer(separator.encode(codec), dtype=code_unit) if len(separator) == 1 else ()
+    return int(separator_units[0]) if len(separator_units) == 1 else None
+
+
+def split_into_csv_row_ranges(file_path, bom_length, code_unit, chunk_size, separator_code=ord(';')):
+    """Splits a CSV file into byte ranges ending on a line break outside of quoted fields"""
+    return list(iterate_csv_row_ranges(file_path, bom_length, code_unit, chunk_size, separator_code))
+
+
+def iterate_csv_row_ranges(file_path, bom_length, code_unit, chunk_size, separator_code=ord(';'),
+                           block_size=8 * 1024 * 1024):
+    """
+    Yields the byte ranges of split_into_csv_row_ranges() from one pass over the file, only whether the
+    current block starts inside a quoted field is carried over
+    """
+    file_size = os.path.getsize(file_path)
+    item_size = np.dtype(code_unit).itemsize
+    number_of_units = (file_size - bom_length) // item_size
+    if number_of_units == 0:
+        yield bom_length, file_size
+        return
+    units = np.memmap(file_path, dtype=code_unit, mode='r', offset=bom_length, shape=(number_of_units,))
+    range_size = max(chunk_size // item_size, 1)
+    block_size = max(block_size // item_size, 1)
+    start = 0
+    in_quotes = False
+    block_start = 0
+    while block_start < number_of_units:
+        block_end = get_csv_block_end(units, block_start + block_size)
+        line_breaks, in_quotes = find_unquoted_line_breaks(
+            units[block_start:block_end], units[block_start - 1] if block_start else ord('\n'), in_quotes,
+            separator_code
+        )
+        line_breaks += block_start
+        # A block holds several range ends when the ranges are smaller than the block
+        position = np.searchsorted(line_breaks, start + range_size)
+        while position < len(line_breaks) and line_breaks[position] + 1 < number_of_units:
+            end = int(line_breaks[position]) + 1
+            yield bom_length + start * item_size, bom_length + end * item_size
+            start = end
+            position = np.searchsorted(line_breaks, start + range_size)
+        block_start = block_end
+    yield bom_length + start * item_size, file_size
+
+
+def find_csv_row_end(file_path, code_unit, start, end, separator_code=ord(';'), block_size=8 * 1024 * 1024):
+    """Returns the byte offset after the first line break in start:end outside of quoted fields, None without one.
+    start must be the start of a row."""
+    item_size = np.dtype(code_unit).itemsize
+    number_of_units = (end - start) // item_size
+    if number_of_units <= 0:
+        return None
+    units = np.memmap(file_path, dtype=code_unit, mode='r', offset=start, shape=(number_of_units,))
+    in_quotes = False
+    block_start = 0
+    while block_start < number_of_units:
+        block_end = get_csv_block_end(units, block_start + block_size)
+        line_breaks, in_quotes = find_unquoted_line_breaks(
+            units[block_start:block_end], units[block_start - 1] if block_start else ord('\n'), in_quotes,
+            separator_code
+        )
+        if len(line_breaks):
+            return start + (block_start + int(line_breaks[0]) + 1) * item_size
+        block_start = block_end
+    return None
+
+
+def get_csv_block_end(units, block_end):
+    # A run of quotes is never split between two blocks, its length decides what it means
+    block_end = min(block_end, len(units))
+    while block_end < len(units) and units[block_end - 1] == ord('"'):
+        block_end += 1
+    return block_end
+
+
+def find_unquoted_line_breaks(block, previous_unit, in_quotes, separator_code):
+    """
+    Positions of the line breaks in block outside of quoted fields and whether block ends inside one. Like the
+    pandas parser a quote only opens a field right after a separator or a line break, anywhere else outside of
+    quotes it is part of the value (e.g. 24" Monitor). In a quoted field "" is a quote and a single one closes it.
+
+    Per run of quotes: an even run changes nothing, an odd run right after a separator or a line break opens or
+    closes a quoted field and any other odd run closes one (or is part of an unquoted value).
+    """
+    is_quote = block == ord('"')
+    run_starts = np.flatnonzero(is_quote & ~np.concatenate(([previous_unit == ord('"')], is_quote[:-1])))
+    run_ends = np.flatnonzero(is_quote & ~np.concatenate((is_quote[1:], [False])))
+    odd_runs = (run_ends - run_starts) % 2 == 0
+    units_before_runs = np.where(run_starts > 0, block[np.maximum(run_starts - 1, 0)], previous_unit)
+    at_field_start = np.isin(units_before_runs, (separator_code, ord('\n'), ord('\r')))
+    toggling_runs = odd_runs & at_field_start
+    closing_runs = odd_runs & ~at_field_start
+    # State after the first k runs: the parity of the toggling runs since the last closing run (or the block start)
+    toggles_before = np.concatenate(([0], np.cumsum(toggling_runs)))
+    last_closing_run = np.concatenate(([0], np.maximum.accumulate(
+        np.where(closing_runs, np.arange(1, len(run_starts) + 1), 0)
+    )))
+
+    def is_in_quotes(number_of_runs):
+        return ((toggles_before[number_of_runs] - toggles_before[last_closing_run[number_of_runs]]) % 2 == 1) ^ (
+            in_quotes & (last_closing_run[number_of_runs] == 0)
+        )
+
+    line_breaks = np.flatnonzero(block == ord('\n'))
+    return (
+        line_breaks[~is_in_quotes(np.searchsorted(run_starts, line_breaks))],
+        bool(is_in_quotes(len(run_starts)))
+    )
+
+
+def read_csv_range(file_path, start, end, codec, separator, names, columns, has_header, dtype):
+    with open(file_path, 'rb') as csv_file:
+        csv_file.seek(start)
+        content = csv_file.read(end - start).decode(codec)
+    return pd.read_csv(
+        io.StringIO(content), sep=separator, header=0 if has_header else None, names=names,
+        usecols=columns, dtype=dtype
+    )
+
+
+def read_consistent_data_frames(pool, read_function, arguments):
+    """Reads the parts in the pool (in process without one) with consistent column types,
+    the last argument of read_function is its dtype"""
+    pool_starmap = pool.starmap if pool else lambda function, iterable: list(starmap(function, iterable))
+    data_frames = pool_starmap(read_function, arguments)
+    # A column that is numeric in one part but text in another is parsed as text everywhere,
+    # like the single threaded parser does for the whole file
+    text_columns = [
+        column for column in data_frames[0].columns
+        if any(is_text_column(data_frame[column]) for data_frame in data_frames)
+        and any(is_numeric_column(data_frame[column]) for data_frame in data_frames)
+    ]
+    if text_columns:
+        reparse_indices = [
+            index for index, data_frame in enumerate(data_frames)
+            if any(is_numeric_column(data_frame[column]) for column in text_columns)
+        ]
+        reparsed_data_frames = pool_starmap(read_function, [
+            arguments[index][:-1] + ({column: str for column in text_columns},) for index in reparse_indices
+        ])
+        for index, data_frame in zip(reparse_indices, reparsed_data_frames):
+            data_frames[index] = data_frame
+    return data_frames
+
+
+def concat_data_frames(data_frames):
+    """Concatenates the parts, those without rows (e.g. only the header) have no column types and would turn
+    numeric columns into text"""
+    return pd.concat(
+        [data_frame for data_frame in data_frames if len(data_frame)] or data_frames[:1], ignore_index=True
+    )
+
+
+def is_text_column(series):
+    return series.dtype == object and series.notnull().any()
+
+
+def is_numeric_column(series):
+    return series.dtype.kind in 'iuf' and series.notnull().any()
+
+
+class MultiFileCSVDataFrameLoader(CSVDataFrameLoader):
+
+    def __init__(self, file_pattern, index_name, encoding="utf-8", separator=";", columns=None, compactor=None,
+                 number_of_workers=os.cpu_count() or 1, source_file_column="SourceFile"):
+        super(MultiFileCSVDataFrameLoader, self).__init__(file_pattern, index_name, encoding, separator, columns, compactor)
+        self.number_of_workers = number_of_workers
+        self.source_file_column = source_file_column
+
+    def read(self):
+        source_file_paths = self.get_source_file_paths()
+        if not source_file_paths:
+            raise FileNotFoundError("No CSV files match '{}'".format(self.file_path))
+        columns = [column for column in self.columns if column != self.source_file_column] if self.columns else None
+        arguments = [
+            (source_file_path, self.encoding, self.separator, columns, None) for source_file_path in source_file_paths
+        ]
+        if self.number_of_workers > 1 and len(arguments) > 1:
+            with Pool(min(self.number_of_workers, len(arguments))) as pool:
+                data_frames = read_consistent_data_frames(pool, read_csv_file, arguments)
+        else:
+            data_frames = read_consistent_data_frames(None, read_csv_file, arguments)
+        data_frame = concat_data_frames(data_frames)
+        # Every row keeps the file it was read from
+        data_frame[self.source_file_column] = pd.Categorical.from_codes(
+            np.repeat(np.arange(len(data_frames)), [len(part) for part in data_frames]),
+            categories=[os.path.relpath(source_file_path, os.path.dirname(self.file_path) or '.')
+                        for source_file_path in source_file_paths]
+        )
+        return data_frame
+
+    def get_source_file_paths(self):
+        return sorted(glob.glob(self.file_path))
+
+    def get_options(self):
+        options = super(MultiFileCSVDataFrameLoader, self).get_options()
+        options.update({'source_file_column' : self.source_file_column})
+        return options
+
+
+def read_csv_file(file_path, encoding, separator, columns, dtype):
+    # Compressed files are decompressed while reading, inferred from the file extension
+    return pd.read_csv(
+        file_path, encoding=encoding, sep=separator, usecols=columns, dtype=dtype, compression='infer'
+    )
+
+
+class ParquetDataFrameLoader(DataFrameLoader):
+
+    def __init__(self, file_path, index_name, columns=None, compactor=None):
+        super(ParquetDataFrameLoader, self).__init__(file_path, index_name, columns, compactor)
+
+    def read(self):
+        return pd.read_parquet(self.file_path, columns=self.columns)
+
+
+class FeatherDataFrameLoader(DataFrameLoader):
+
+    def __init__(self, file_path, index_name, columns=None, compactor=None):
+        super(FeatherDataFrameLoader, self).__init__(file_path, index_name, columns, compactor)
+
+    def read(self):
+        # read_feather only takes columns from pandas 0.24 on
+        data_frame = pd.read_feather(self.file_path)
+        return data_frame[self.columns] if self.columns is not None else data_frame
+
+
+class DataFrameCompactor:
+
+    def __init__(self, max_category_ratio=0.5, exclude_columns=()):
+        self.max_category_ratio = max_category_ratio
+        self.exclude_columns = exclude_columns
+
+    def get_options(self):
+        return {'max_category_ratio' : self.max_category_ratio, 'exclude_columns' : list(self.exclude_columns)}
+
+    def compact(self, data_frame):
+        for column in data_frame.columns:
+            if column not in self.exclude_columns:
+                data_frame[column] = self.compact_column(data_frame[column])
+        return data_frame
+
+    def compact_column(self, series):
+        if pd.api.types.is_integer_dtype(series):
+            return pd.to_numeric(series, downcast='integer')
+        if series.dtype != object:
+            return series
+        distinct_values = series.dropna().unique()
+        if not series.isnull().any() and self.__is_datetime(distinct_values):
+            return pd.to_datetime(series)
+        if len(distinct_values) <= self.max_category_ratio * len(series):
+            # Categories in order of appearance keep value_counts ties in the original order
+            return pd.Series(pd.Categorical(series, categories=distinct_values), index=series.index, name=series.name)
+        return series
+
+    def __is_datetime(self, distinct_values):
+        # Only safe when every value renders back to exactly its raw text, the rules validate str(value)
+        # (str of a Timestamp, a date-only column would not, its values gain ' 00:00:00')
+        if len(distinct_values) == 0 or not all(isinstance(value, str) for value in distinct_values[:100]):
+            return False
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                datetime_values = pd.to_datetime(pd.Series(distinct_values), errors='coerce')
+        except (ValueError, TypeError, OverflowError):
+            return False
+        return (not datetime_values.isnull().any()) and (datetime_values.map(str).values == distinct_values).all()
+
+
+class SnapshotDataFrameLoader(DataFrameLoader):
+
+    def __init__(self, loader, snapshot_directory, snapshot_format="pickle"):
+        super(SnapshotDataFrameLoader, self).__init__(loader.file_path, loader.index_name, loader.columns)
+        self.loader = loader
+        self.snapshot_directory = snapshot_directory
+        self.snapshot_format = snapshot_format
+        # Files of the same name in other directories get their own snapshots
+        self.snapshot_name = "{}.{}".format(
+            re.sub(r'[^\w.-]', '_', os.path.basename(self.file_path)),
+            hashlib.sha1(os.path.abspath(self.file_path).encode('utf-8')).hexdigest()[:12]
+        )
+
+    def load(self):
+        os.makedirs(self.snapshot_directory, exist_ok=True)
+        # Loads with other options (e.g. other columns) keep their own snapshot, only the one for outdated
+        # content is replaced
+        snapshot_prefix = "{}.{}".format(self.snapshot_name, self.__get_options_key())
+        snapshot_file_path = os.path.join(
+            self.snapshot_directory,
+            "{}.{}.{}".format(snapshot_prefix, self.__get_content_key(), self.snapshot_format)
+        )
+        if os.path.isfile(snapshot_file_path):
+            print("Load Snapshot: '{}'".format(snapshot_file_path))
+            return self.__read_snapshot(snapshot_file_path)
+        data_frame = self.loader.load()
+        self.__write_snapshot(data_frame, snapshot_prefix, snapshot_file_path)
+        return data_frame
+
+    def read(self):
+        return self.loader.read()
+
+    def __get_options_key(self):
+        options_key = json.dumps(self.loader.get_options(), sort_keys=True)
+        return hashlib.sha1(options_key.encode('utf-8')).hexdigest()[:12]
+
+    def __get_content_key(self):
+        content_key = json.dumps(self.__get_fingerprints(), sort_keys=True)
+        return hashlib.sha1(content_key.encode('utf-8')).hexdigest()
+
+    def __get_fingerprints(self):
+        # The content hash of a file is only recomputed when its size or mtime
+        # changed, a touched but unchanged file still hits the existing snapshot
+        fingerprint_file_path = os.path.join(self.snapshot_directory, self.snapshot_name + ".fingerprint.json")
+        known_fingerprints = {}
+        if os.path.isfile(fingerprint_file_path):
+            with open(fingerprint_file_path, encoding="utf-8") as fingerprint_file:
+                known_fingerprints = json.load(fingerprint_file)
+        fingerprints = {}
+        for source_file_path in self.loader.get_source_file_paths():
+            file_stat = os.stat(source_file_path)
+            fingerprint = known_fingerprints.get(source_file_path)
+            if not fingerprint or fingerprint['size'] != file_stat.st_size or fingerprint['mtime'] != file_stat.st_mtime_ns:
+                fingerprint = {
+                    'size' : file_stat.st_size,
+                    'mtime' : file_stat.st_mtime_ns,
+                    'content_hash' : self.__get_content_hash(source_file_path)
+                }
+            fingerprints[source_file_path] = fingerprint
+        with open(fingerprint_file_path, "w", encoding="utf-8") as fingerprint_file:
+            json.dump(fingerprints, fingerprint_file)
+        return [
+            [source_file_path, fingerprint['size'], fingerprint['content_hash']]
+            for source_file_path, fingerprint in fingerprints.items()
+        ]
+
+    def __get_content_hash(self, source_file_path):
+        content_hash = hashlib.blake2b()
+        with open(source_file_path, 'rb') as data_file:
+            for block in iter(lambda: data_file.read(8 * 1024 * 1024), b''):
+                content_hash.update(block)
+        return content_hash.hexdigest()
+
+    def __read_snapshot(self, snapshot_file_path):
+        if self.snapshot_format == "feather":
+            from pyarrow import feather
+            data_frame = feather.read_table(snapshot_file_path, memory_map=True).to_pandas()
+            data_frame.set_index(self.index_name, inplace=True, drop=False)
+            return data_frame
+        return pd.read_pickle(snapshot_file_path)
+
+    def __write_snapshot(self, data_frame, snapshot_prefix, snapshot_file_path):
+        for stale_snapshot_file_path in glob.glob(
+                os.path.join(glob.escape(self.snapshot_directory), glob.escape(snapshot_prefix) + ".*." + self.snapshot_format)):
+            os.remove(stale_snapshot_file_path)
+        temporary_file_path = snapshot_file_path + ".tmp"
+        if self.snapshot_format == "feather":
+            data_frame.reset_index(drop=True).to_feather(temporary_file_path)
+        else:
+            data_frame.to_pickle(temporary_file_path)
+        os.replace(temporary_file_path, snapshot_file_path)
@@ -0,0 +1,45 @@
+import codecs
+import io
+import mmap
+import pandas as pd
+
+
+class SourceRowLookup:
+
+    def __init__(self, file_path, index_file_path, index_name, encoding="utf-8", separator=";"):
+        self.file_path = file_path
+        self.index_name = index_name
+        self.encoding = encoding
+        self.separator = separator
+        self.row_index = pd.read_csv(
+            index_file_path, encoding="utf-8", sep=";", dtype={index_name: str}, keep_default_na=False
+        ).set_index(index_name)
+        self.columns = list(pd.read_csv(file_path, encoding=encoding, sep=separator, nrows=0).columns)
+        self.codec = self.__detect_codec()
+
+    def get_rows(self, index_values):
+        keys = [str(index_value) for index_value in index_values if str(index_value) in self.row_index.index]
+        if not keys:
+            return pd.DataFrame(columns=self.columns)
+        row_positions = self.row_index.loc[keys].sort_values('offset')
+        with open(self.file_path, 'rb') as data_file:
+            with mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                rows_content = b''.join(
+                    data[offset:offset + length]
+                    for offset, length in zip(row_positions['offset'], row_positions['length'])
+                ).decode(self.codec)
+        return pd.read_csv(
+            io.StringIO(rows_content), sep=self.separator, header=None, names=self.columns,
+            dtype=str, na_filter=False
+        )
+
+    def __detect_codec(self):
+        with open(self.file_path, 'rb') as data_file:
+            bom = data_file.read(3)
+        if bom.startswith(codecs.BOM_UTF16_LE):
+            return 'utf-16-le'
+        if bom.startswith(codecs.BOM_UTF16_BE):
+            return 'utf-16-be'
+        if bom.startswith(codecs.BOM_UTF8):
+            return 'utf-8'
+        return self.encoding
@@ -1,21 +1,199 @@
 from settings.settings import *
+import argparse
+import contextlib
+import glob
+import io
 import json
+import multiprocessing
 import os
-import pandas as pd
-from factories import AttributeAnalysisJSONFactory
-from renderer import AttributeAnalysisHTMLRenderer, BusinessRulesDetailsHTMLRenderer
-
-
-data_frame = pd.read_csv(CSV_FILE_PATH, encoding=CSV_FILE_ENCODING, sep=CSV_FILE_SEPARATOR)
-data_frame.set_index(PANDAS_INDEX_NAME, inplace=True, drop=False)
-report_directory = REPORT_DIRECTORY
-
-for json_file_name in [file_name for file_name in os.listdir(ATTRIBUTE_SETTINGS_LOCATION)
-                       if os.path.isfile(os.path.join(ATTRIBUTE_SETTINGS_LOCATION, file_name))
-                          and file_name.endswith('.json')]:
-    with open(os.path.join(ATTRIBUTE_SETTINGS_LOCATION, json_file_name), encoding="utf-8") as json_file:
-        json_data = json.load(json_file)
-        attribute_analysis = AttributeAnalysisJSONFactory(json_data, data_frame).create()
-        attribute_analysis.run()
-        AttributeAnalysisHTMLRenderer(attribute_analysis, report_directory).render()
-        BusinessRulesDetailsHTMLRenderer(attribute_analysis, report_directory + "/details").render()
\ No newline at end of file
+from factories import (
+    AttributeAnalysisJSONFactory, ChunkedCSVProfilerSettingsFactory, DataFrameLoaderSettingsFactory,
+    DataSourceSettingsFactory
+)
+from lookup import SourceRowLookup
+from memory import get_peak_rss, set_memory_budget
+from planning import ExecutionPlanner
+from renderer import AttributeAnalysisHTMLRenderer, BusinessRulesDetailsHTMLRenderer, QuickScanHTMLRenderer
+from rules import verdict_cache
+from scanning import QuickScanner
+from sources import StateDataSource
+from states import read_partial_profile_states, write_partial_profile_state
+from watching import AttributeSettingsWatcher
+
+
+argument_parser = argparse.ArgumentParser(description="Attribute Analysis")
+argument_parser.add_argument(
+    '--shard', nargs=2, type=int, metavar=('NUMBER', 'SHARDS'),
+    help="only profile shard NUMBER (0 based) of SHARDS, a byte range of CSV_FILE_PATH or a block of its files, "
+         "and write the partial result to --partial-result instead of rendering"
+)
+argument_parser.add_argument('--partial-result', help="file the partial result of --shard is written to")
+argument_parser.add_argument(
+    '--reduce', nargs='+', metavar='PARTIAL_RESULT', help="merge the partial results of all shards and render the reports"
+)
+argument_parser.add_argument(
+    '--jobs', type=int, default=1, metavar='N',
+    help="run the attribute analyses in N processes sharing the loaded data (needs fork, e.g. Linux)"
+)
+argument_parser.add_argument(
+    '--watch', nargs='?', type=float, const=1.0, metavar='SECONDS',
+    help="keep the data loaded and re-run the analyses whose attribute settings change (polled every SECONDS)"
+)
+argument_parser.add_argument(
+    '--quick-scan', action='store_true',
+    help="profile every column without attribute settings and only write an overview report (uses --jobs)"
+)
+argument_parser.add_argument(
+    '--dry-run', action='store_true', help="print the execution plan and the estimated cost per attribute and exit"
+)
+
+# The loaded data of the forked --jobs workers, set before the pool is started
+job_data_source = None
+job_source_row_lookup = None
+
+
+def run_attribute_analysis(json_data, data_source, source_row_lookup, indicator_cache=None):
+    attribute_analysis_factory = AttributeAnalysisJSONFactory(json_data, data_source, indicator_cache)
+    attribute_analysis = attribute_analysis_factory.create()
+    attribute_analysis.run()
+    AttributeAnalysisHTMLRenderer(attribute_analysis, REPORT_DIRECTORY, SOURCE_FILE_COLUMN).render()
+    BusinessRulesDetailsHTMLRenderer(
+        attribute_analysis, REPORT_DIRECTORY + "/details", source_row_lookup
+    ).render()
+    return attribute_analysis_factory.indicator_cache
+
+
+def run_attribute_analysis_job(json_data):
+    # The output of a job is printed by the parent, in the order of the attribute settings
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        run_attribute_analysis(json_data, job_data_source, job_source_row_lookup)
+    return output.getvalue()
+
+
+def main():
+    global job_data_source, job_source_row_lookup
+    arguments = argument_parser.parse_args()
+    if arguments.shard and not arguments.partial_result:
+        argument_parser.error("--shard needs --partial-result")
+    if arguments.watch and (arguments.shard or arguments.reduce or CSV_CHUNK_SIZE or PROFILE_STATE_FILE_PATH):
+        argument_parser.error("--watch needs the data in memory, it does not work with profile states")
+
+    if arguments.quick_scan:
+        if DATA_FILE_FORMAT == 'sqlite':
+            argument_parser.error("--quick-scan needs a data file that is loaded into memory")
+        data_frame = DataFrameLoaderSettingsFactory(
+            CSV_FILE_PATH, DATA_FILE_FORMAT, PANDAS_INDEX_NAME, CSV_FILE_ENCODING, CSV_FILE_SEPARATOR, None,
+            COMPACT_DATA_FRAME, COMPACT_MAX_CATEGORY_RATIO, SNAPSHOT_DIRECTORY, SNAPSHOT_FORMAT,
+            CSV_PARSER_WORKERS, CSV_PARSER_CHUNK_SIZE, SOURCE_FILE_COLUMN
+        ).create().load()
+        QuickScanHTMLRenderer(QuickScanner(data_frame, arguments.jobs).scan(), REPORT_DIRECTORY).render()
+        return
+
+    set_memory_budget(MEMORY_BUDGET, SPILL_DIRECTORY)
+    verdict_cache.max_size = VERDICT_CACHE_SIZE
+
+    json_datas = []
+    for json_file_name in [file_name for file_name in os.listdir(ATTRIBUTE_SETTINGS_LOCATION)
+                           if os.path.isfile(os.path.join(ATTRIBUTE_SETTINGS_LOCATION, file_name))
+                              and file_name.endswith('.json')]:
+        with open(os.path.join(ATTRIBUTE_SETTINGS_LOCATION, json_file_name), encoding="utf-8") as json_file:
+            json_datas.append(json.load(json_file))
+
+    # Only the index and the attributes of the enabled configs are loaded,
+    # watching loads all for configs yet to come
+    columns = (
+        list(dict.fromkeys([PANDAS_INDEX_NAME] + [json_data['attribute_name'] for json_data in json_datas]))
+        if not arguments.watch else None
+    )
+
+    chunked_csv_profiler_factory = ChunkedCSVProfilerSettingsFactory(
+        CSV_FILE_PATH, PANDAS_INDEX_NAME, json_datas, CSV_FILE_ENCODING, CSV_FILE_SEPARATOR,
+        CSV_CHUNK_SIZE, PROFILE_STATE_FILE_PATH
+    )
+
+    if arguments.shard:
+        write_partial_profile_state(
+            arguments.partial_result, chunked_csv_profiler_factory.create().profile_shard(*arguments.shard),
+            arguments.shard[0], arguments.shard[1], chunked_csv_profiler_factory.get_state_key()
+        )
+        return
+
+    if arguments.reduce:
+        profile_state = read_partial_profile_states(arguments.reduce, chunked_csv_profiler_factory.get_state_key())
+        # The rows of values only invalid once typed need the source, it is skipped on hosts without it
+        if glob.glob(CSV_FILE_PATH):
+            chunked_csv_profiler_factory.create().add_missing_index_values(profile_state)
+        data_source = StateDataSource(profile_state)
+    else:
+        data_source = DataSourceSettingsFactory(
+            CSV_FILE_PATH, DATA_FILE_FORMAT, PANDAS_INDEX_NAME, SQLITE_TABLE_NAME,
+            DataFrameLoaderSettingsFactory(
+                CSV_FILE_PATH, DATA_FILE_FORMAT, PANDAS_INDEX_NAME, CSV_FILE_ENCODING, CSV_FILE_SEPARATOR, columns,
+                COMPACT_DATA_FRAME, COMPACT_MAX_CATEGORY_RATIO, SNAPSHOT_DIRECTORY, SNAPSHOT_FORMAT,
+                CSV_PARSER_WORKERS, CSV_PARSER_CHUNK_SIZE, SOURCE_FILE_COLUMN
+            ),
+            chunked_csv_profiler_factory if CSV_CHUNK_SIZE or PROFILE_STATE_FILE_PATH else None
+        ).create()
+    source_row_lookup = (
+        SourceRowLookup(
+            CSV_FILE_PATH, SOURCE_ROW_INDEX_FILE_PATH, PANDAS_INDEX_NAME, CSV_FILE_ENCODING, CSV_FILE_SEPARATOR
+        )
+        if SOURCE_ROW_INDEX_FILE_PATH else None
+    )
+
+    # Computed up front the value counts are shared by forked workers, under a budget they are computed on demand
+    # and the plan is estimated without them
+    planner = ExecutionPlanner(json_datas, data_source, arguments.jobs, use_value_counts=MEMORY_BUDGET is None)
+    plan = planner.create_plan()
+    if arguments.dry_run:
+        print(plan.format())
+        return
+    if MEMORY_BUDGET is None:
+        planner.prepare(plan)
+
+    if arguments.watch:
+        indicator_caches = {}
+        print("Watching '{}'...".format(ATTRIBUTE_SETTINGS_LOCATION))
+        for changed_file_names, removed_file_names in AttributeSettingsWatcher(
+                ATTRIBUTE_SETTINGS_LOCATION, arguments.watch).watch():
+            for json_file_name in removed_file_names:
+                indicator_caches.pop(json_file_name, None)
+            for json_file_name in changed_file_names:
+                try:
+                    json_file_path = os.path.join(ATTRIBUTE_SETTINGS_LOCATION, json_file_name)
+                    with open(json_file_path, encoding="utf-8") as json_file:
+                        json_data = json.load(json_file)
+                    indicator_caches[json_file_name] = run_attribute_analysis(
+                        json_data, data_source, source_row_lookup, indicator_caches.get(json_file_name)
+                    )
+                except Exception as error:
+                    # A half saved or broken file (e.g. an invalid pattern) is picked up again with its next change
+                    indicator_caches.pop(json_file_name, None)
+                    print("Skipped '{}': {}: {}".format(json_file_name, error.__class__.__name__, error))
+    elif arguments.jobs > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        # Forked workers share the loaded data copy-on-write, nothing is pickled but the settings and the output
+        job_data_source, job_source_row_lookup = data_source, source_row_lookup
+        with multiprocessing.get_context('fork').Pool(min(arguments.jobs, len(json_datas) or 1)) as pool:
+            # The most expensive analyses are started first, the outputs are gathered in the order of the settings
+            jobs = {
+                attribute_index: pool.apply_async(run_attribute_analysis_job, (json_datas[attribute_index],))
+                for attribute_index in plan.get_schedule()
+            }
+            for attribute_index in range(len(json_datas)):
+                print(jobs[attribute_index].get(), end="")
+    else:
+        if arguments.jobs > 1:
+            print("--jobs needs the fork start method, running the analyses one after another")
+        for json_data in json_datas:
+            run_attribute_analysis(json_data, data_source, source_row_lookup)
+
+    if get_peak_rss() is not None:
+        print("Peak RSS: {:.1f} MiB{}".format(get_peak_rss() / 1024 ** 2, (
+            ", largest worker {:.1f} MiB".format(get_peak_rss('children') / 1024 ** 2) if arguments.jobs > 1 else ""
+        )))
+
+
+# Started with spawn (e.g. Windows or macOS) the loader pools import this module again in every worker
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+import os
+import pickle
+import sys
+import tempfile
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, peak RSS is not reported there
+    resource = None
+
+
+# Bytes of RSS after which cached intermediate results spill to temporary files (None = no budget)
+memory_budget = None
+spill_directory = None
+
+
+def set_memory_budget(number_of_bytes, directory=None):
+    global memory_budget, spill_directory
+    memory_budget = number_of_bytes
+    spill_directory = directory
+
+
+def get_current_rss():
+    """RSS of this process in bytes, None where /proc is not available"""
+    try:
+        with open("/proc/self/statm") as statm_file:
+            return int(statm_file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def get_peak_rss(who='self'):
+    """Peak RSS in bytes of this process ('self') or of its largest terminated child ('children')"""
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF if who == 'self' else resource.RUSAGE_CHILDREN).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak_rss if sys.platform == 'darwin' else peak_rss * 1024
+
+
+def is_memory_budget_exceeded():
+    if memory_budget is None:
+        return False
+    current_rss = get_current_rss()
+    return current_rss is not None and current_rss > memory_budget
+
+
+class SpilledObject:
+    """Pickled to an anonymous temporary file and unpickled again on every load"""
+
+    def __init__(self, value):
+        self.spill_file = tempfile.TemporaryFile(dir=spill_directory)
+        content = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        self.spill_file.write(content)
+        self.spill_file.flush()
+        self.size = len(content)
+
+    def load(self):
+        # Read at an explicit offset, forked workers share the file position
+        return pickle.loads(os.pread(self.spill_file.fileno(), self.size, 0))
+
+
+class SpillingCache:
+    """Cache whose entries are pickled to temporary files once the memory budget is exceeded, loaded again when read"""
+
+    def __init__(self):
+        self.entries = {}
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key):
+        entry = self.entries[key]
+        return entry.load() if isinstance(entry, SpilledObject) else entry
+
+    def set(self, key, value):
+        if is_memory_budget_exceeded():
+            for cached_key, entry in self.entries.items():
+                self.entries[cached_key] = self.__spill(entry)
+            self.entries[key] = self.__spill(value)
+        else:
+            self.entries[key] = value
+        return value
+
+    def __spill(self, entry):
+        return entry if isinstance(entry, SpilledObject) else SpilledObject(entry)
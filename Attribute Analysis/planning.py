@@ -0,0 +1,159 @@
+from collections import OrderedDict
+import heapq
+
+
+# Computed once in the main process before the analyses, the workers share the results
+PREPARED_NODE_KINDS = ('load', 'value_counts')
+# Rows the value lengths are estimated from when the value counts are not computed for the plan
+SAMPLE_SIZE = 100000
+
+
+class PlanNode:
+
+    def __init__(self, key, cost, dependencies=()):
+        self.key = key
+        self.cost = cost
+        self.dependencies = list(dependencies)
+        self.attribute_indices = []
+
+    def get_description(self):
+        return "{}({})".format(self.key[0], ", ".join(str(part) for part in self.key[1:]))
+
+    def is_prepared(self):
+        return self.key[0] in PREPARED_NODE_KINDS
+
+
+class ExecutionPlan:
+    """DAG of the computations of all attribute analyses, identical nodes are shared between the analyses"""
+
+    def __init__(self, json_datas, number_of_workers=1):
+        self.json_datas = json_datas
+        self.number_of_workers = number_of_workers
+        self.nodes = OrderedDict()
+        self.attribute_nodes = [[] for _ in json_datas]
+
+    def add_node(self, attribute_index, key, cost, dependencies=()):
+        if key not in self.nodes:
+            self.nodes[key] = PlanNode(key, cost, dependencies)
+        node = self.nodes[key]
+        if attribute_index not in node.attribute_indices:
+            node.attribute_indices.append(attribute_index)
+            self.attribute_nodes[attribute_index].append(key)
+        return key
+
+    def get_prepared_nodes(self):
+        return [node for node in self.nodes.values() if node.is_prepared()]
+
+    def get_attribute_cost(self, attribute_index):
+        return sum(
+            self.nodes[key].cost for key in self.attribute_nodes[attribute_index] if not self.nodes[key].is_prepared()
+        )
+
+    def get_schedule(self):
+        """Attribute indices, the most expensive first (longest processing time first)"""
+        return sorted(range(len(self.json_datas)), key=lambda index: -self.get_attribute_cost(index))
+
+    def get_worker_assignments(self):
+        workers = [(0, worker, []) for worker in range(self.number_of_workers)]
+        for attribute_index in self.get_schedule():
+            load, worker, attribute_indices = heapq.heappop(workers)
+            attribute_indices.append(attribute_index)
+            heapq.heappush(workers, (load + self.get_attribute_cost(attribute_index), worker, attribute_indices))
+        return sorted(workers, key=lambda worker: worker[1])
+
+    def format(self):
+        lines = ["Execution Plan ({} worker{}):".format(self.number_of_workers, "s" if self.number_of_workers > 1 else "")]
+        lines.append("     Prepared Computations:")
+        for node in self.get_prepared_nodes():
+            lines.append("          {:<60} {:>16,}  used by {}".format(
+                node.get_description(), node.cost, len(node.attribute_indices)
+            ))
+        for attribute_index in self.get_schedule():
+            lines.append("     {:<65} {:>16,}".format(
+                "Attribute '{}'".format(self.json_datas[attribute_index]['attribute_name']),
+                self.get_attribute_cost(attribute_index)
+            ))
+            for key in self.attribute_nodes[attribute_index]:
+                node = self.nodes[key]
+                if not node.is_prepared():
+                    lines.append("          {:<60} {:>16,}".format(node.get_description(), node.cost))
+        if self.number_of_workers > 1:
+            lines.append("     Estimated Worker Loads:")
+            for load, worker, attribute_indices in self.get_worker_assignments():
+                lines.append("          Worker {}: {:,} ({})".format(worker, load, ", ".join(
+                    self.json_datas[attribute_index]['attribute_name'] for attribute_index in attribute_indices
+                )))
+        return "\n".join(lines)
+
+
+class ExecutionPlanner:
+    """
+    Estimates the cost of every computation from the cardinality and the value lengths of its column. Without
+    use_value_counts (e.g. under a memory budget) the distinct values are only counted and the value lengths are
+    estimated from a sample, nothing is left in the caches of the data source.
+    """
+
+    def __init__(self, json_datas, data_source, number_of_workers=1, use_value_counts=True):
+        self.json_datas = json_datas
+        self.data_source = data_source
+        self.number_of_workers = number_of_workers
+        self.use_value_counts = use_value_counts
+        self.column_statistics = {}
+
+    def create_plan(self):
+        plan = ExecutionPlan(self.json_datas, self.number_of_workers)
+        for attribute_index, json_data in enumerate(self.json_datas):
+            attribute_name = json_data['attribute_name']
+            number_of_rows, number_of_values, mean_length = self.__get_column_statistics(attribute_name)
+            column = plan.add_node(attribute_index, ('load', attribute_name), number_of_rows)
+            value_counts = plan.add_node(attribute_index, ('value_counts', attribute_name), number_of_rows, [column])
+            indicators = [
+                plan.add_node(
+                    attribute_index,
+                    ('indicator', attribute_name, json_indicator_data['indicator_name'], attribute_index),
+                    self.__estimate_indicator_cost(
+                        json_indicator_data['indicator_name'], number_of_values, mean_length
+                    ),
+                    [value_counts]
+                )
+                for json_indicator_data in json_data['indicators']
+            ]
+            number_of_rules = len(json_data['business_rules'])
+            rules = plan.add_node(
+                attribute_index, ('business_rules', attribute_name, number_of_rules, attribute_index),
+                int(number_of_values * max(number_of_rules, 1) * mean_length), [value_counts]
+            )
+            plan.add_node(
+                attribute_index, ('render', attribute_name, attribute_index),
+                number_of_values + number_of_rows, indicators + [rules]
+            )
+        return plan
+
+    def prepare(self, plan):
+        """Computes the value counts once, before the analyses (and their workers) need them"""
+        for node in plan.get_prepared_nodes():
+            if node.key[0] == 'value_counts':
+                self.data_source.get_value_counts(node.key[1], dropna=False)
+                self.data_source.get_value_counts(node.key[1], dropna=True)
+
+    def __get_column_statistics(self, attribute_name):
+        if attribute_name not in self.column_statistics:
+            if self.use_value_counts:
+                values = self.data_source.get_value_counts(attribute_name, dropna=False).index
+                number_of_values = len(values)
+            else:
+                values = self.data_source.get_value_sample(attribute_name, SAMPLE_SIZE)
+                number_of_values = self.data_source.get_number_of_distinct_values(attribute_name)
+            mean_length = sum(len(str(value)) for value in values) / len(values) if len(values) else 0
+            self.column_statistics[attribute_name] = (
+                self.data_source.get_number_of_rows(), number_of_values, max(mean_length, 1)
+            )
+        return self.column_statistics[attribute_name]
+
+    def __estimate_indicator_cost(self, indicator_name, number_of_values, mean_length):
+        if indicator_name == 'SimilarValuesIndicator':
+            # Every pair of distinct values is compared by SequenceMatcher
+            return int(number_of_values * (number_of_values - 1) / 2 * mean_length * mean_length)
+        if indicator_name in ('PatternFrequencyIndicator', 'ShortestValuesIndicator'):
+            return int(number_of_values * mean_length)
+        return number_of_values
@@ -0,0 +1,39 @@
+"""
+In-process profiling of a DataFrame that is already in memory, nothing is read from or written to disk.
+
+    from profiling import profile_data_frame
+    results = profile_data_frame(data_frame, [attribute_settings, ...])
+
+The attribute settings have the format of the files in ATTRIBUTE_SETTINGS_LOCATION, 'dropna', 'indicators'
+and 'business_rules' may be left out.
+"""
+import contextlib
+import io
+from factories import AttributeAnalysisJSONFactory
+from sources import DataFrameDataSource
+
+
+DEFAULT_ATTRIBUTE_SETTINGS = {'dropna': False, 'indicators': [], 'business_rules': []}
+
+
+def profile_data_frame(data_frame, attribute_settings, verbose=False):
+    """Results of AttributeAnalysis.get_result(), a list for a list of attribute settings"""
+    attribute_analyses = create_attribute_analyses(data_frame, attribute_settings)
+    for attribute_analysis in attribute_analyses:
+        with contextlib.ExitStack() if verbose else contextlib.redirect_stdout(io.StringIO()):
+            attribute_analysis.run()
+    results = [attribute_analysis.get_result() for attribute_analysis in attribute_analyses]
+    return results if isinstance(attribute_settings, list) else results[0]
+
+
+def create_attribute_analyses(data_frame, attribute_settings):
+    """Analyses over one data source, the value counts of a column are shared between them"""
+    data_source = DataFrameDataSource(data_frame)
+    json_datas = attribute_settings if isinstance(attribute_settings, list) else [attribute_settings]
+    for json_data in json_datas:
+        if not data_source.has_column(json_data['attribute_name']):
+            raise KeyError(json_data['attribute_name'])
+    return [
+        AttributeAnalysisJSONFactory(dict(DEFAULT_ATTRIBUTE_SETTINGS, **json_data), data_source).create()
+        for json_data in json_datas
+    ]
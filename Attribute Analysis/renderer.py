@@ -15,9 +15,10 @@ class AttributeAnalysisRenderer(ABC):
 
 class AttributeAnalysisHTMLRenderer(AttributeAnalysisRenderer):
 
-    def __init__(self, attribute_analysis, output_directory):
+    def __init__(self, attribute_analysis, output_directory, source_file_column=None):
         super(AttributeAnalysisHTMLRenderer, self).__init__(attribute_analysis)
         self.output_directory = output_directory
+        self.source_file_column = source_file_column
         self.output_file_path = "{output_directory}/{output_file_name}.html".format(
             output_directory = self.output_directory,
             output_file_name = attribute_analysis.attribute_name
@@ -89,7 +90,7 @@ class AttributeAnalysisHTMLRenderer(AttributeAnalysisRenderer):
 
     def __render_business_rules(self):
         print("          Business Rules")
-        self.html_output += BusinessRulesHTMLRenderer(self.attribute_analysis).render()
+        self.html_output += BusinessRulesHTMLRenderer(self.attribute_analysis, self.source_file_column).render()
 
     def __render_footer(self):
         self.html_output += """      
@@ -343,7 +344,7 @@ class ValueRangeHTMLRenderer(IndicatorRenderer):
             """.format(
                 value=value,
                 count=count,
-                count_percentage=round((count / len(self.indicator.data_frame[self.indicator.attribute_name])) * 100, 2)
+                count_percentage=round((count / self.indicator.data_source.get_number_of_rows()) * 100, 2)
             )
         return html_output
 
@@ -409,7 +410,7 @@ class PatternFrequencyHTMLRenderer(IndicatorRenderer):
             """.format(
                 pattern = pattern,
                 frequency = frequency,
-                frequency_percentage = round((frequency / len(self.indicator.data_frame[self.indicator.attribute_name])) * 100, 2)
+                frequency_percentage = round((frequency / self.indicator.data_source.get_number_of_rows()) * 100, 2)
             )
         return html_output
 
@@ -478,8 +479,9 @@ class BusinessRulesRenderer(ABC):
 
 class BusinessRulesHTMLRenderer(BusinessRulesRenderer):
 
-    def __init__(self, attribute_analysis):
+    def __init__(self, attribute_analysis, source_file_column=None):
         super(BusinessRulesHTMLRenderer, self).__init__(attribute_analysis)
+        self.source_file_column = source_file_column
         self.html_output = "<h3>Geschäftsregel</h3>"
 
     def render(self):
@@ -490,10 +492,12 @@ class BusinessRulesHTMLRenderer(BusinessRulesRenderer):
         self.html_output += """
                                 {business_rules_metadata}
                                 {business_rules_result_overview}
+                                {source_files}
                                 {invalid_rows}
                 """.format(
             business_rules_metadata=self.__render_business_rules_result_overview_metadata(),
             business_rules_result_overview=self.__render_business_rules_result_overview_pie_charts(),
+            source_files=self.__render_source_files(),
             invalid_rows=self.__render_invalid_data_sets()
         )
 
@@ -630,6 +634,46 @@ class BusinessRulesHTMLRenderer(BusinessRulesRenderer):
 
 
 
+    def __render_source_files(self):
+        data_source = self.attribute_analysis.data_source
+        if not self.source_file_column or not data_source.has_column(self.source_file_column):
+            return ""
+        invalid_values = self.attribute_analysis.business_rules_results['invalid']['overall'].get('values', {})
+        data_sets_counts = data_source.get_value_counts(self.source_file_column).sort_index()
+        invalid_data_sets_counts = data_source.get_value_counts_of_rows(
+            self.source_file_column, self.attribute_analysis.attribute_name, invalid_values.keys()
+        )
+        html_output = """
+                        <h5>Invalide Datensätze je Quelldatei:</h5>
+                        <table class="table">
+                            <tr>
+                                <th>Quelldatei</th>
+                                <th>Datensätze</th>
+                                <th>Invalide Datensätze</th>
+                                <th>Invalide Datensätze (%)</th>
+                            </tr>
+        """
+        for source_file, data_sets_count in data_sets_counts.items():
+            invalid_data_sets_count = invalid_data_sets_counts.get(source_file, 0)
+            html_output += """
+                            <tr>
+                                <td>{source_file}</td>
+                                <td>{data_sets_count}</td>
+                                <td>{invalid_data_sets_count}</td>
+                                <td>{invalid_data_sets_percentage}</td>
+                            </tr>
+            """.format(
+                source_file=source_file,
+                data_sets_count=data_sets_count,
+                invalid_data_sets_count=invalid_data_sets_count,
+                invalid_data_sets_percentage=round((invalid_data_sets_count / data_sets_count) * 100, 2)
+                if data_sets_count else 0
+            )
+        html_output += """
+                        </table>
+        """
+        return html_output
+
     def __render_invalid_data_sets(self):
         pass
         invalid_data_sets = """
@@ -640,19 +684,24 @@ class BusinessRulesHTMLRenderer(BusinessRulesRenderer):
         """.format(
             invalid_data_sets_cnt = "<b>{}</b> invalide Datensätze gefunden von <b>{}</b> Datensätzen insgesamt".format(
                 str(self.attribute_analysis.business_rules_results['invalid']['overall']['count']),
-                str(len(self.attribute_analysis.data_frame[self.attribute_analysis.attribute_name]))
+                str(self.attribute_analysis.data_source.get_number_of_rows())
             ),
             invalid_values_cnt = "<b>{}</b> invalide Werte gefunden von <b>{}</b> unterschiedlichen Werten insgesamt".format(
                 str(len(self.attribute_analysis.business_rules_results['invalid']['overall']['values']))
                 if 'values' in self.attribute_analysis.business_rules_results['invalid']['overall'] else 0,
-                self.attribute_analysis.data_frame[self.attribute_analysis.attribute_name].nunique(dropna=False)
+                len(self.attribute_analysis.data_source.get_value_counts(self.attribute_analysis.attribute_name, dropna=False))
             )
         )
         if 'values' in self.attribute_analysis.business_rules_results['invalid']['overall']:
             value_idx = 1
-            for value, results in self.attribute_analysis.business_rules_results['invalid']['overall']['values'].items():
+            invalid_values = self.attribute_analysis.business_rules_results['invalid']['overall']['values']
+            for value, results in invalid_values.get_top_items(self.attribute_analysis.max_listed_values):
                 invalid_data_sets += self.__render_invalid_data_set(value, results, value_idx)
                 value_idx += 1
+            if value_idx <= len(invalid_values):
+                invalid_data_sets += """
+                        <p>Die <b>{}</b> häufigsten invaliden Werte werden aufgeführt.</p>
+                """.format(value_idx - 1)
 
         invalid_data_sets += """
                         </div>
@@ -703,7 +752,7 @@ class BusinessRulesHTMLRenderer(BusinessRulesRenderer):
                             </div>
         """.format(
             count=results['count'],
-            data_sets_indexes=list(results['data_sets'].index.values)
+            data_sets_indexes=list(self.attribute_analysis.get_index_values(value))
         )
 
         return invalid_data_set
@@ -761,9 +810,10 @@ class PlotlyPieChartHTMLRenderer:
 
 class BusinessRulesDetailsHTMLRenderer():
 
-    def __init__(self, attribute_analysis, output_directory):
+    def __init__(self, attribute_analysis, output_directory, source_row_lookup=None):
         self.attribute_analysis = attribute_analysis
         self.output_directory = output_directory
+        self.source_row_lookup = source_row_lookup
 
     def render(self):
         print("     Render Business Rule Details")
@@ -775,16 +825,19 @@ class BusinessRulesDetailsHTMLRenderer():
                 "{output_directory}/{attribute_name}/".format(
                     output_directory = self.output_directory,
                     attribute_name = self.attribute_analysis.attribute_name,
-                )
+                ),
+                self.source_row_lookup
             ).render()
 
 
 class BusinessRuleDetailsHTMLRenderer():
 
-    def __init__(self, business_rule, attribute_analysis, output_directory):
+    def __init__(self, business_rule, attribute_analysis, output_directory, source_row_lookup=None, max_source_rows=50):
         self.business_rule = business_rule
         self.attribute_analysis = attribute_analysis
         self.output_directory = output_directory
+        self.source_row_lookup = source_row_lookup
+        self.max_source_rows = max_source_rows
         self.html_output = ""
         self.output_file_path = "{output_directory}{business_rule_details_file_name}.html".format(
             output_directory=self.output_directory,
@@ -852,7 +905,7 @@ class BusinessRuleDetailsHTMLRenderer():
         invalid_values_total_percentage = round((invalid_values_total / values_total) * 100, 2)
 
         values_distinct = (
-            self.attribute_analysis.data_frame[self.attribute_analysis.attribute_name].nunique(dropna=False)
+            len(self.attribute_analysis.data_source.get_value_counts(self.attribute_analysis.attribute_name, dropna=False))
         )
         invalid_values_distinct = 0
         if 'values' in self.attribute_analysis.business_rules_results['invalid'][business_rule_id]:
@@ -961,6 +1014,7 @@ class BusinessRuleDetailsHTMLRenderer():
                         <th>Wert</th>
                         <th>Häufigkeit</th>
                         <th>Indizes</th>
+                        {source_rows_header}
                     </tr>
                 </thead>
                 <tbody>
@@ -968,6 +1022,7 @@ class BusinessRuleDetailsHTMLRenderer():
                 </tbody>
             </table>
         """.format(
+            source_rows_header="<th>Datensätze</th>" if self.source_row_lookup else "",
             invalid_values=self.__render_invalid_values_details()
         )
 
@@ -975,16 +1030,103 @@ class BusinessRuleDetailsHTMLRenderer():
         html_output = ""
         if 'values' not in self.attribute_analysis.business_rules_results['invalid'][self.business_rule.__class__.__name__]:
             return html_output
-        for value, results in self.attribute_analysis.business_rules_results['invalid'][self.business_rule.__class__.__name__]['values'].items():
+        for value, results in self.attribute_analysis.business_rules_results['invalid'][self.business_rule.__class__.__name__]['values'].get_top_items(self.attribute_analysis.max_listed_values):
+            index_values = self.attribute_analysis.get_index_values(value)
             html_output += """
                 <tr>
                     <td>"{value}"</td>
                     <td>{count}</td>
                     <td>{index}</td>
+                    {source_rows}
                 </tr>
             """.format(
                 value=value,
                 count=results['count'],
-                index=list(results['data_sets'].index.values)
+                index=list(index_values),
+                source_rows=self.__render_source_rows(index_values)
             )
-        return html_output
\ No newline at end of file
+        return html_output
+
+    def __render_source_rows(self, index_values):
+        if not self.source_row_lookup:
+            return ""
+        source_rows = self.source_row_lookup.get_rows(index_values[:self.max_source_rows])
+        return """
+                    <td>
+                        <details>
+                            <summary>{number_of_rows} von {number_of_index_values} anzeigen</summary>
+                            {source_rows}
+                        </details>
+                    </td>
+        """.format(
+            number_of_rows=source_rows.shape[0],
+            number_of_index_values=len(index_values),
+            source_rows=source_rows.to_html(classes="table table-sm", index=False)
+        )
+
+
+class QuickScanHTMLRenderer:
+
+    def __init__(self, column_scans, output_directory):
+        self.column_scans = column_scans
+        self.output_file_path = "{}/quick_scan.html".format(output_directory)
+        os.makedirs(os.path.dirname(self.output_file_path), exist_ok=True)
+        self.html_output = ""
+
+    def render(self):
+        print("Render Quick Scan")
+        self.html_output = """
+            <!DOCTYPE html>
+            <html lang="de">
+                <head>
+                    <meta charset="utf-8" />
+                    <meta name="viewport" content="width=device-width, initial-scale=1.0" />
+                    <link rel="stylesheet" href="https://stackpath.bootstrapcdn.com/bootstrap/4.1.0/css/bootstrap.min.css" integrity="sha384-9gVQ4dYFwwWSjIDZnLEWnxCjeSWFphJiwGPXr1jddIhOegiu1FwO5qRGvFXOdJZ4" crossorigin="anonymous">
+                    <title>Schnellanalyse</title>
+                </head>
+                <body>
+                    <div class="container-fluid">
+                        <h1>Schnellanalyse aller Attribute</h1><br/>
+                        <p>Analysezeitstempel: {analysis_date}</p>
+                        <table class="table table-sm">
+                            <tr>
+                                <th>Attribut</th>
+                                <th>Datensätze</th>
+                                <th>Fehlende Werte (%)</th>
+                                <th>Unterschiedliche Werte</th>
+                                <th>Einmalige Werte</th>
+                                <th>Häufigste Werte</th>
+                                <th>Häufigste Muster</th>
+                                <th>Länge (min / Ø / max)</th>
+                            </tr>
+        """.format(analysis_date=datetime.datetime.now())
+        for column_scan in self.column_scans:
+            self.html_output += """
+                            <tr>
+                                <td>{column}</td>
+                                <td>{number_of_rows}</td>
+                                <td>{null_count} ({null_percentage})</td>
+                                <td>{distinct_count}</td>
+                                <td>{unique_count}</td>
+                                <td>{top_values}</td>
+                                <td>{patterns}</td>
+                                <td>{min_length} / {mean_length} / {max_length}</td>
+                            </tr>
+            """.format(
+                top_values="<br/>".join(
+                    "{} ({})".format(value, count) for value, count in column_scan['top_values']
+                ),
+                patterns="<br/>".join(
+                    "{} ({})".format(pattern, count) for pattern, count in column_scan['patterns']
+                ),
+                **{key: value for key, value in column_scan.items() if key not in ('top_values', 'patterns')}
+            )
+        self.html_output += """
+                        </table>
+                    </div>
+                </body>
+            </html>
+        """
+        output_file = open(self.output_file_path, "w", encoding="UTF-8")
+        output_file.write(self.html_output)
+        output_file.close()
@@ -0,0 +1,121 @@
+from collections.abc import Mapping
+from itertools import islice
+import numpy as np
+import pandas as pd
+
+
+class BusinessRuleResultStore:
+    """
+    Rule verdicts of all distinct values of an attribute: the values are interned once (their position is their
+    code), the counts are one array and the verdicts one bit array per rule
+    """
+
+    def __init__(self, values, counts, business_rules, verdicts):
+        self.values = list(values)
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.business_rules = list(business_rules)
+        self.number_of_values = len(self.values)
+        self.verdict_bits = [np.packbits(np.asarray(rule_verdicts, dtype=bool)) for rule_verdicts in verdicts]
+
+    def get_verdicts(self, rule_index):
+        return np.unpackbits(self.verdict_bits[rule_index])[:self.number_of_values].astype(bool)
+
+    def get_overall_verdicts(self):
+        overall_verdicts = np.ones(self.number_of_values, dtype=bool)
+        for rule_index in range(len(self.business_rules)):
+            overall_verdicts &= self.get_verdicts(rule_index)
+        return overall_verdicts
+
+    def get_business_rules_results(self):
+        """The results in the layout of AttributeAnalysis.business_rules_results, the values are lazy views"""
+        if not self.number_of_values:
+            return {}
+        business_rules_results = {'valid': {}, 'invalid': {}}
+        rule_indices_by_name = {}
+        for rule_index, business_rule in enumerate(self.business_rules):
+            rule_indices_by_name.setdefault(business_rule.__class__.__name__, []).append(rule_index)
+        for business_rule_name, rule_indices in rule_indices_by_name.items():
+            self.__add_results(business_rules_results, business_rule_name, [
+                self.get_verdicts(rule_index) for rule_index in rule_indices
+            ], None)
+        self.__add_results(business_rules_results, 'overall', [self.get_overall_verdicts()], self.business_rules)
+        return business_rules_results
+
+    def __add_results(self, business_rules_results, business_rule_name, verdicts, business_rules):
+        # Rules configured more than once share a name, their counts add up like the entries of one rule
+        for validity, valid in (('valid', True), ('invalid', False)):
+            masks = [rule_verdicts == valid for rule_verdicts in verdicts]
+            business_rules_results[validity][business_rule_name] = {
+                'count': int(sum(self.counts[mask].sum() for mask in masks))
+            }
+            positions = np.flatnonzero(np.logical_or.reduce(masks))
+            if len(positions):
+                business_rules_results[validity][business_rule_name]['values'] = BusinessRuleValuesView(
+                    self, positions, valid, business_rules
+                )
+
+
+class BusinessRuleValuesView(Mapping):
+    """value -> {'result': ..., 'count': ...} of the values at positions, built when they are accessed"""
+
+    def __init__(self, store, positions, valid, business_rules=None):
+        self.store = store
+        self.positions = positions.astype(np.int32) if store.number_of_values < 2 ** 31 else positions
+        self.valid = valid
+        self.business_rules = business_rules
+        self.value_positions = None
+
+    def __getitem__(self, value):
+        if self.value_positions is None:
+            self.value_positions = {self.store.values[position]: position for position in self.positions}
+        return self.__get_value_result(self.value_positions[value])
+
+    def __iter__(self):
+        return (self.store.values[position] for position in self.positions)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def items(self):
+        return ((self.store.values[position], self.__get_value_result(position)) for position in self.positions)
+
+    def get_top_items(self, number_of_values=None):
+        """The items of the most frequent values, the values are ordered by their count already"""
+        return islice(self.items(), number_of_values)
+
+    def __get_value_result(self, position):
+        if self.business_rules is None:
+            result = self.valid
+        else:
+            result = {
+                business_rule: bool(self.store.verdict_bits[rule_index][position >> 3] & (0x80 >> (position & 7)))
+                for rule_index, business_rule in enumerate(self.business_rules)
+            }
+        return {'result': result, 'count': int(self.store.counts[position])}
+
+
+class RowGroups:
+    """
+    Row positions of every distinct value of a column in CSR form: the rows ordered by value (stable, so the rows
+    of a value keep their order), the offset of each value's rows and the value -> code index of the factorization
+    """
+
+    def __init__(self, values):
+        codes, uniques = pd.factorize(values)
+        # Missing values get the code after the last distinct value
+        self.null_code = len(uniques)
+        codes[codes == -1] = self.null_code
+        position_dtype = np.int32 if len(codes) < 2 ** 31 else np.int64
+        self.row_order = np.argsort(codes, kind="mergesort").astype(position_dtype)
+        self.offsets = np.zeros(self.null_code + 2, dtype=position_dtype)
+        np.cumsum(np.bincount(codes, minlength=self.null_code + 1), out=self.offsets[1:])
+        self.uniques = pd.Index(uniques)
+
+    def get_row_positions(self, value):
+        if pd.isnull(value):
+            code = self.null_code
+        else:
+            code = self.uniques.get_indexer([value])[0]
+            if code == -1:
+                return self.row_order[:0]
+        return self.row_order[self.offsets[code]:self.offsets[code + 1]]
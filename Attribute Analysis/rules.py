@@ -1,11 +1,15 @@
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from pandas import isnull
 import regex as re
+import weakref
 
 class BusinessRule(ABC):
 
     def __init__(self, name):
         self.name = name
+        # Identifies the configuration of rules that do not describe it, they never share verdicts
+        self.instance_key = object()
 
     @abstractmethod
     def is_valid(self, value):
@@ -15,6 +19,10 @@ class BusinessRule(ABC):
     def get_description(self):
         pass
 
+    def get_configuration(self):
+        """Everything besides the class a verdict depends on, hashable. Rules without state return ()."""
+        return self.instance_key,
+
 
 class NotNullRule(BusinessRule):
 
@@ -24,6 +32,9 @@ class NotNullRule(BusinessRule):
     def is_valid(self, value):
         return not isnull(value)
 
+    def get_configuration(self):
+        return ()
+
     def get_description(self):
         return "Wert muss befüllt sein"
 
@@ -41,6 +52,9 @@ class RegExPatternMatchingRule(BusinessRule):
             return True
         return self.regex.match(str(value))
 
+    def get_configuration(self):
+        return self.pattern, self.dropna
+
     def get_description(self):
         return "Wert muss Regulärem Ausdruck '{regex}' entsprechen".format(
             regex = self.pattern
@@ -131,6 +145,9 @@ class DomainListMatchingRule(BusinessRule):
             return True
         return str(value) in self.values
 
+    def get_configuration(self):
+        return tuple(self.values), self.dropna
+
     def get_description(self):
         return "Wert muss einem Wert aus der folgenden Liste entsprechen: {}".format(
             self.__get_value_list_as_string()
@@ -178,5 +195,59 @@ class NoFoldingWhiteSpacesRule(BusinessRule):
     def is_valid(self, value):
         return len(str(value).strip()) == len(str(value))
 
+    def get_configuration(self):
+        return ()
+
     def get_description(self):
-        return "Wert darf keine umschließenden Leerzeichen enthalten"
\ No newline at end of file
+        return "Wert darf keine umschließenden Leerzeichen enthalten"
+
+
+class VerdictCache:
+    """
+    Least recently used verdicts per rule class, rule configuration and value. Related attributes share most of
+    their values, each (rule, value) pair is then only evaluated once per process.
+    """
+
+    def __init__(self, max_size=1000000):
+        self.max_size = max_size
+        self.verdicts = OrderedDict()
+        # Every distinct (rule class, configuration) gets a small id once, the verdict keys only hold the id
+        self.rule_ids = {}
+        self.business_rule_ids = weakref.WeakKeyDictionary()
+
+    def is_valid(self, business_rule, value):
+        return self.get_verdicts(business_rule, [value])[0]
+
+    def get_verdicts(self, business_rule, values):
+        if not self.max_size:
+            return [bool(business_rule.is_valid(value)) for value in values]
+        rule_id = self.__get_rule_id(business_rule)
+        return [self.__get_verdict(business_rule, rule_id, value) for value in values]
+
+    def __get_rule_id(self, business_rule):
+        # The configuration (e.g. a long domain list) is only built and hashed for the first lookup of a rule
+        rule_id = self.business_rule_ids.get(business_rule)
+        if rule_id is None:
+            rule_key = (business_rule.__class__.__name__, business_rule.get_configuration())
+            rule_id = self.rule_ids.setdefault(rule_key, len(self.rule_ids))
+            self.business_rule_ids[business_rule] = rule_id
+        return rule_id
+
+    def __get_verdict(self, business_rule, rule_id, value):
+        key = (rule_id, type(value), None if isnull(value) else value)
+        try:
+            verdict = self.verdicts[key]
+        except KeyError:
+            verdict = bool(business_rule.is_valid(value))
+            self.verdicts[key] = verdict
+            if len(self.verdicts) > self.max_size:
+                self.verdicts.popitem(last=False)
+        except TypeError:
+            # Unhashable values are evaluated every time
+            return bool(business_rule.is_valid(value))
+        else:
+            self.verdicts.move_to_end(key)
+        return verdict
+
+
+verdict_cache = VerdictCache()
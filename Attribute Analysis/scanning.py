@@ -0,0 +1,63 @@
+from multiprocessing import get_all_start_methods, get_context
+import numpy as np
+from indicators import get_value_pattern
+
+
+# The data frame forked workers scan, shared copy-on-write instead of being pickled per column
+scanned_data_frame = None
+
+
+class QuickScanner:
+    """Profiles every column without attribute settings, everything is derived from one value count per column"""
+
+    def __init__(self, data_frame, number_of_workers=1, number_of_top_values=5, number_of_patterns=3):
+        self.data_frame = data_frame
+        self.number_of_workers = number_of_workers
+        self.number_of_top_values = number_of_top_values
+        self.number_of_patterns = number_of_patterns
+
+    def scan(self):
+        global scanned_data_frame
+        arguments = [
+            (column, self.number_of_top_values, self.number_of_patterns) for column in self.data_frame.columns
+        ]
+        if self.number_of_workers <= 1 or 'fork' not in get_all_start_methods():
+            return [
+                scan_column(self.data_frame[column], number_of_top_values, number_of_patterns)
+                for column, number_of_top_values, number_of_patterns in arguments
+            ]
+        scanned_data_frame = self.data_frame
+        try:
+            with get_context('fork').Pool(self.number_of_workers) as pool:
+                return pool.starmap(scan_data_frame_column, arguments, chunksize=1)
+        finally:
+            scanned_data_frame = None
+
+
+def scan_data_frame_column(column, number_of_top_values, number_of_patterns):
+    return scan_column(scanned_data_frame[column], number_of_top_values, number_of_patterns)
+
+
+def scan_column(series, number_of_top_values=5, number_of_patterns=3):
+    value_counts = series.value_counts(dropna=True)
+    number_of_rows = len(series)
+    null_count = number_of_rows - int(value_counts.sum())
+    counts = value_counts.values
+    lengths = np.array([len(str(value)) for value in value_counts.index], dtype=np.int64)
+    pattern_counts = {}
+    for value, count in value_counts.items():
+        value_pattern = get_value_pattern(str(value))
+        pattern_counts[value_pattern] = pattern_counts.get(value_pattern, 0) + int(count)
+    return {
+        'column': series.name,
+        'number_of_rows': number_of_rows,
+        'null_count': null_count,
+        'null_percentage': round(null_count / number_of_rows * 100, 2) if number_of_rows else 0.0,
+        'distinct_count': len(value_counts),
+        'unique_count': int((counts == 1).sum()),
+        'top_values': [(value, int(count)) for value, count in value_counts[:number_of_top_values].items()],
+        'patterns': sorted(pattern_counts.items(), key=lambda pattern_count: -pattern_count[1])[:number_of_patterns],
+        'min_length': int(lengths.min()) if len(lengths) else None,
+        'mean_length': round(float((lengths * counts).sum() / counts.sum()), 2) if len(lengths) else None,
+        'max_length': int(lengths.max()) if len(lengths) else None
+    }
@@ -0,0 +1,116 @@
+from settings.settings import *
+import argparse
+import json
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from factories import AttributeAnalysisJSONFactory, DataFrameLoaderSettingsFactory, DataSourceSettingsFactory
+from lookup import SourceRowLookup
+from renderer import AttributeAnalysisHTMLRenderer, BusinessRulesDetailsHTMLRenderer
+
+
+class ProfilingServer(HTTPServer):
+    """Keeps the data source and its value counts in memory between the requests"""
+
+    def __init__(self, server_address, data_source, report_directory, source_file_column=None, source_row_lookup=None):
+        super(ProfilingServer, self).__init__(server_address, ProfilingRequestHandler)
+        self.data_source = data_source
+        self.report_directory = report_directory
+        self.source_file_column = source_file_column
+        self.source_row_lookup = source_row_lookup
+
+    def create_attribute_analysis(self, json_data):
+        if not self.data_source.has_column(json_data['attribute_name']):
+            raise KeyError(json_data['attribute_name'])
+        return AttributeAnalysisJSONFactory(json_data, self.data_source).create()
+
+    def profile(self, attribute_analysis, render=False):
+        attribute_analysis.run()
+        result = attribute_analysis.get_result()
+        if render:
+            attribute_analysis_renderer = AttributeAnalysisHTMLRenderer(
+                attribute_analysis, self.report_directory, self.source_file_column
+            )
+            attribute_analysis_renderer.render()
+            BusinessRulesDetailsHTMLRenderer(
+                attribute_analysis, self.report_directory + "/details", self.source_row_lookup
+            ).render()
+            result['report'] = attribute_analysis_renderer.output_file_path
+        return result
+
+
+class ProfilingRequestHandler(BaseHTTPRequestHandler):
+    """
+    GET  /status   index name and number of rows of the loaded data
+    POST /profile  attribute settings (one or a list) as in ATTRIBUTE_SETTINGS_LOCATION, returns their results
+    POST /render   as /profile and also writes the reports to REPORT_DIRECTORY
+    """
+
+    def do_GET(self):
+        if self.path != '/status':
+            self.__send_json(404, {'error': "unknown path '{}'".format(self.path)})
+            return
+        self.__send_json(200, {
+            'index_name': self.server.data_source.index_name,
+            'number_of_rows': int(self.server.data_source.get_number_of_rows())
+        })
+
+    def do_POST(self):
+        if self.path not in ('/profile', '/render'):
+            self.__send_json(404, {'error': "unknown path '{}'".format(self.path)})
+            return
+        # Settings the analyses and their rules cannot be created from (e.g. an invalid pattern) are the client's
+        # error, anything failing while they run is the server's
+        try:
+            json_data = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))).decode("utf-8"))
+            attribute_analyses = [
+                self.server.create_attribute_analysis(attribute_json_data)
+                for attribute_json_data in (json_data if isinstance(json_data, list) else [json_data])
+            ]
+        except Exception as error:
+            self.__send_error(400, error)
+            return
+        try:
+            results = [
+                self.server.profile(attribute_analysis, render=self.path == '/render')
+                for attribute_analysis in attribute_analyses
+            ]
+        except Exception as error:
+            self.__send_error(500, error)
+            return
+        self.__send_json(200, results if isinstance(json_data, list) else results[0])
+
+    def __send_error(self, status, error):
+        self.__send_json(status, {'error': "{}: {}".format(error.__class__.__name__, error)})
+
+    def __send_json(self, status, data):
+        content = json.dumps(data, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header('Content-Type', "application/json; charset=utf-8")
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+if __name__ == '__main__':
+    argument_parser = argparse.ArgumentParser(description="Attribute Analysis Server")
+    argument_parser.add_argument('--host', default="127.0.0.1")
+    argument_parser.add_argument('--port', type=int, default=8765)
+    arguments = argument_parser.parse_args()
+
+    # All columns are loaded, any attribute can be profiled without restarting the server
+    data_source = DataSourceSettingsFactory(
+        CSV_FILE_PATH, DATA_FILE_FORMAT, PANDAS_INDEX_NAME, SQLITE_TABLE_NAME,
+        DataFrameLoaderSettingsFactory(
+            CSV_FILE_PATH, DATA_FILE_FORMAT, PANDAS_INDEX_NAME, CSV_FILE_ENCODING, CSV_FILE_SEPARATOR, None,
+            COMPACT_DATA_FRAME, COMPACT_MAX_CATEGORY_RATIO, SNAPSHOT_DIRECTORY, SNAPSHOT_FORMAT,
+            CSV_PARSER_WORKERS, CSV_PARSER_CHUNK_SIZE, SOURCE_FILE_COLUMN
+        )
+    ).create()
+    source_row_lookup = (
+        SourceRowLookup(CSV_FILE_PATH, SOURCE_ROW_INDEX_FILE_PATH, PANDAS_INDEX_NAME, CSV_FILE_ENCODING, CSV_FILE_SEPARATOR)
+        if SOURCE_ROW_INDEX_FILE_PATH else None
+    )
+    server = ProfilingServer(
+        (arguments.host, arguments.port), data_source, REPORT_DIRECTORY, SOURCE_FILE_COLUMN, source_row_lookup
+    )
+    print("Serving on http://{}:{}".format(arguments.host, arguments.port))
+    server.serve_forever()
@@ -1,6 +1,38 @@
+# A single file or a glob like "C://Data/Incidents_*.csv.gz", compressed files (.gz, .bz2, ...) are read as a stream
 CSV_FILE_PATH = "C://Data/Incidents_2016_2017_archiviert.csv"
+# "csv", "parquet" or "feather" (as written by the CSV Converter), or "sqlite" to profile
+# SQLITE_TABLE_NAME of the SQLite database at CSV_FILE_PATH with GROUP BY / COUNT queries
+DATA_FILE_FORMAT = "csv"
+SQLITE_TABLE_NAME = "Incidents"
 CSV_FILE_ENCODING = "utf-8"
 CSV_FILE_SEPARATOR = ";"
+# Parse the CSV file in byte ranges on several processes (1 = single threaded pandas.read_csv)
+CSV_PARSER_WORKERS = 1
+CSV_PARSER_CHUNK_SIZE = 64 * 1024 * 1024
+# Stream the CSV in chunks of this many rows and profile mergeable per attribute state instead
+# of loading the whole file (None = load the whole file)
+CSV_CHUNK_SIZE = None
+# Persist the chunked profile state here, later runs only profile the rows appended since
+PROFILE_STATE_FILE_PATH = None
+# Column with the file each row was read from when CSV_FILE_PATH is a glob
+SOURCE_FILE_COLUMN = "SourceFile"
+# Row index sidecar written by the CSV Converter, enables original rows on the detail pages
+SOURCE_ROW_INDEX_FILE_PATH = None
 PANDAS_INDEX_NAME = "FullId"
+# Store low-cardinality columns as categoricals and safe columns as datetime64 / small integers
+COMPACT_DATA_FRAME = False
+COMPACT_MAX_CATEGORY_RATIO = 0.5
+# Binary snapshots of the loaded DataFrame, reused while the source file is unchanged
+SNAPSHOT_DIRECTORY = None
+# "pickle" or "feather" (memory-mapped, needs pyarrow)
+SNAPSHOT_FORMAT = "pickle"
+# Bytes of RSS (e.g. 4 * 1024 ** 3) after which the cached value counts of the loaded data move to
+# temporary files in SPILL_DIRECTORY (None = system temp directory) and are read back when needed
+# (None = no budget). The loaded data itself and the tables of the running analysis (e.g. the row
+# positions of its values) stay in memory.
+MEMORY_BUDGET = None
+SPILL_DIRECTORY = None
+# Rule verdicts per (rule, configuration, value) kept for reuse across attributes (0 = no cache)
+VERDICT_CACHE_SIZE = 1000000
 ATTRIBUTE_SETTINGS_LOCATION = "./settings/attributes"
 REPORT_DIRECTORY = "C://Data/Reports"
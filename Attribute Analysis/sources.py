@@ -0,0 +1,291 @@
+from abc import ABC, abstractmethod
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+from memory import SpillingCache
+from results import RowGroups
+from states import NULL_VALUE, get_typed_values
+
+
+class DataSource(ABC):
+
+    def __init__(self, index_name):
+        self.index_name = index_name
+
+    @abstractmethod
+    def get_number_of_rows(self):
+        pass
+
+    @abstractmethod
+    def has_column(self, column):
+        pass
+
+    @abstractmethod
+    def get_value_counts(self, attribute_name, dropna=True):
+        """Counts per distinct value, the most frequent first and ties in order of first appearance"""
+        pass
+
+    @abstractmethod
+    def get_value_counts_of_rows(self, column, attribute_name, values):
+        """Counts per value of column over the rows whose attribute value is one of values"""
+        pass
+
+    @abstractmethod
+    def get_index_values(self, attribute_name, value):
+        pass
+
+    def prepare_index_values(self, attribute_name, values):
+        """Called with the values whose index values a report lists before the first get_index_values()"""
+        pass
+
+    def get_null_count(self, attribute_name):
+        value_counts = self.get_value_counts(attribute_name, dropna=False)
+        return value_counts[value_counts.index.isnull()].sum()
+
+    def get_number_of_distinct_values(self, attribute_name):
+        """Number of distinct values, missing values count as one"""
+        return len(self.get_value_counts(attribute_name, dropna=False))
+
+    def get_value_sample(self, attribute_name, number_of_rows):
+        """Distinct values of a sample of number_of_rows rows, e.g. the first ones"""
+        return self.get_value_counts(attribute_name, dropna=False).index[:number_of_rows]
+
+
+class DataFrameDataSource(DataSource):
+
+    def __init__(self, data_frame, index_name=None):
+        super(DataFrameDataSource, self).__init__(index_name or data_frame.index.name)
+        self.data_frame = data_frame
+        self.value_counts = SpillingCache()
+        self.row_groups = None
+
+    def get_number_of_rows(self):
+        return self.data_frame.shape[0]
+
+    def has_column(self, column):
+        return column in self.data_frame.columns
+
+    def get_value_counts(self, attribute_name, dropna=True):
+        if (attribute_name, dropna) not in self.value_counts:
+            return self.value_counts.set(
+                (attribute_name, dropna), self.data_frame[attribute_name].value_counts(dropna=dropna)
+            )
+        return self.value_counts.get((attribute_name, dropna))
+
+    def get_number_of_distinct_values(self, attribute_name):
+        # Counted without the value counts, they are not cached for it
+        return self.data_frame[attribute_name].nunique(dropna=False)
+
+    def get_value_sample(self, attribute_name, number_of_rows):
+        return self.data_frame[attribute_name].iloc[:number_of_rows].unique()
+
+    def get_value_counts_of_rows(self, column, attribute_name, values):
+        values = list(values)
+        rows = self.data_frame[attribute_name].isin(values)
+        if any(pd.isnull(value) for value in values):
+            rows |= self.data_frame[attribute_name].isnull()
+        return self.data_frame.loc[rows.values, column].value_counts(sort=False)
+
+    def get_index_values(self, attribute_name, value):
+        return self.data_frame.index.values[self.__get_row_groups(attribute_name).get_row_positions(value)]
+
+    def __get_row_groups(self, attribute_name):
+        """Row positions per distinct value from one factorization of the column instead of a scan per value"""
+        # Only the attribute of the running report is kept, the row groups of the previous one are dropped first
+        if self.row_groups is None or self.row_groups[0] != attribute_name:
+            self.row_groups = None
+            self.row_groups = (attribute_name, RowGroups(self.data_frame[attribute_name]))
+        return self.row_groups[1]
+
+
+class SQLiteDataSource(DataSource):
+
+    # Stays below the bound parameter limit of older SQLite builds
+    MAX_QUERY_PARAMETERS = 500
+
+    def __init__(self, database_path, table_name, index_name):
+        super(SQLiteDataSource, self).__init__(index_name)
+        self.database_path = database_path
+        self.table_name = table_name
+        self.connection = None
+        self.connection_pid = None
+        self.number_of_rows = None
+        self.columns = None
+        self.value_counts = {}
+        self.index_values = None
+
+    def get_number_of_rows(self):
+        if self.number_of_rows is None:
+            self.number_of_rows = self.__execute("SELECT COUNT(*) FROM {table}")[0][0]
+        return self.number_of_rows
+
+    def has_column(self, column):
+        if self.columns is None:
+            self.columns = [row[1] for row in self.__execute("PRAGMA table_info({table})")]
+        return column in self.columns
+
+    def get_value_counts(self, attribute_name, dropna=True):
+        if (attribute_name, dropna) not in self.value_counts:
+            # Only the distinct values and their counts leave the database
+            rows = self.__execute(
+                "SELECT {column}, COUNT(*) FROM {table} "
+                + ("WHERE {column} IS NOT NULL " if dropna else "")
+                + "GROUP BY {column} ORDER BY COUNT(*) DESC, MIN(rowid)",
+                column=attribute_name
+            )
+            self.value_counts[(attribute_name, dropna)] = self.__to_value_counts(rows)
+        return self.value_counts[(attribute_name, dropna)]
+
+    def get_null_count(self, attribute_name):
+        return self.__execute("SELECT COUNT(*) FROM {table} WHERE {column} IS NULL", column=attribute_name)[0][0]
+
+    def get_number_of_distinct_values(self, attribute_name):
+        # COUNT(DISTINCT) leaves out NULL, it counts as one value like in the value counts
+        return self.__execute(
+            "SELECT COUNT(DISTINCT {column}) + IFNULL(MAX({column} IS NULL), 0) FROM {table}", column=attribute_name
+        )[0][0]
+
+    def get_value_sample(self, attribute_name, number_of_rows):
+        rows = self.__execute(
+            "SELECT DISTINCT {column} FROM (SELECT {column} FROM {table} ORDER BY rowid LIMIT ?)",
+            [number_of_rows], column=attribute_name
+        )
+        return [np.nan if row[0] is None else row[0] for row in rows]
+
+    def get_value_counts_of_rows(self, column, attribute_name, values):
+        value_counts = {}
+        for condition, parameters in self.__get_value_conditions(values):
+            rows = self.__execute(
+                "SELECT {column}, COUNT(*) FROM {table} WHERE " + condition + " GROUP BY {column}",
+                parameters, column=column, attribute=attribute_name
+            )
+            for value, count in rows:
+                value_counts[value] = value_counts.get(value, 0) + count
+        return self.__to_value_counts(value_counts.items())
+
+    def prepare_index_values(self, attribute_name, values):
+        # The rows of all listed values are fetched by a few batched queries instead of a scan of the unindexed
+        # table per value. Only the values of the running report are kept.
+        # A value listed by several business rules is fetched once
+        index_values = {None if pd.isnull(value) else value: [] for value in values}
+        self.index_values = None
+        for condition, parameters in self.__get_value_conditions(index_values):
+            rows = self.__execute(
+                "SELECT {attribute}, {index} FROM {table} WHERE " + condition + " ORDER BY rowid",
+                parameters, attribute=attribute_name, index=self.index_name
+            )
+            for value, index_value in rows:
+                index_values.setdefault(value, []).append(index_value)
+        self.index_values = (attribute_name, index_values)
+
+    def get_index_values(self, attribute_name, value):
+        value = None if pd.isnull(value) else value
+        if self.index_values is None or self.index_values[0] != attribute_name or value not in self.index_values[1]:
+            # A value that was not prepared is looked up on its own
+            rows = self.__execute(
+                "SELECT {index} FROM {table} WHERE "
+                + ("{attribute} IS NULL" if value is None else "{attribute} = ?") + " ORDER BY rowid",
+                [] if value is None else [value], attribute=attribute_name, index=self.index_name
+            )
+            return self.__to_array([row[0] for row in rows])
+        return self.__to_array(self.index_values[1][value])
+
+    def __get_value_conditions(self, values):
+        """WHERE conditions and their parameters that together select the rows of values, in batches of IN"""
+        values = list(values)
+        conditions = [("{attribute} IS NULL", [])] if any(pd.isnull(value) for value in values) else []
+        values = [value for value in values if not pd.isnull(value)]
+        for start in range(0, len(values), self.MAX_QUERY_PARAMETERS):
+            batch = values[start:start + self.MAX_QUERY_PARAMETERS]
+            conditions.append(("{attribute} IN (" + ", ".join("?" * len(batch)) + ")", batch))
+        return conditions
+
+    def __execute(self, query, parameters=(), **identifiers):
+        identifiers = {name: quote_identifier(identifier) for name, identifier in identifiers.items()}
+        identifiers['table'] = quote_identifier(self.table_name)
+        return self.__get_connection().execute(query.format(**identifiers), list(parameters)).fetchall()
+
+    def __get_connection(self):
+        # A connection must not be shared with forked processes, each process opens its own
+        if self.connection is None or self.connection_pid != os.getpid():
+            self.connection = sqlite3.connect("file:{}?mode=ro".format(self.database_path), uri=True)
+            self.connection_pid = os.getpid()
+        return self.connection
+
+    def __to_array(self, values):
+        array = np.empty(len(values), dtype=object)
+        array[:] = values
+        return array
+
+    def __to_value_counts(self, rows):
+        rows = list(rows)
+        return pd.Series(
+            [count for _, count in rows],
+            index=pd.Index([np.nan if value is None else value for value, _ in rows], dtype=object),
+            dtype=np.int64
+        )
+
+
+def quote_identifier(identifier):
+    return '"{}"'.format(identifier.replace('"', '""'))
+
+
+class StateDataSource(DataSource):
+    """Answers from a merged ProfileState, the rows themselves are never held in memory"""
+
+    def __init__(self, profile_state):
+        super(StateDataSource, self).__init__(profile_state.index_name)
+        self.profile_state = profile_state
+        self.value_counts = {}
+        self.text_values = {}
+
+    def get_number_of_rows(self):
+        return self.profile_state.number_of_rows
+
+    def has_column(self, column):
+        return column in self.profile_state.attribute_states
+
+    def get_value_counts(self, attribute_name, dropna=True):
+        if (attribute_name, dropna) not in self.value_counts:
+            value_counts = self.__get_typed_value_counts(attribute_name)
+            if dropna:
+                value_counts = value_counts[value_counts.index.notnull()]
+            self.value_counts[(attribute_name, dropna)] = value_counts.sort_values(ascending=False, kind="mergesort")
+        return self.value_counts[(attribute_name, dropna)]
+
+    def get_value_counts_of_rows(self, column, attribute_name, values):
+        # Only the tracked attributes are known, there are no other columns to break down by
+        raise KeyError(column)
+
+    def get_index_values(self, attribute_name, value):
+        attribute_state = self.profile_state.attribute_states[attribute_name]
+        text_values = self.__get_text_values(attribute_name).get(NULL_VALUE if pd.isnull(value) else value, [])
+        index_values = [attribute_state.get_index_values(text_value) for text_value in text_values]
+        return np.concatenate(index_values) if index_values else np.array([], dtype=object)
+
+    def __get_text_values(self, attribute_name):
+        """Typed value -> the text values of the state that read as it"""
+        if attribute_name not in self.text_values:
+            attribute_state = self.profile_state.attribute_states[attribute_name]
+            typed_values = get_typed_values(
+                list(attribute_state.value_counts), attribute_state.value_counts[NULL_VALUE] > 0
+            )
+            self.text_values[attribute_name] = {}
+            for text_value in attribute_state.value_counts:
+                typed_value = typed_values[text_value]
+                typed_key = NULL_VALUE if pd.isnull(typed_value) else typed_value
+                self.text_values[attribute_name].setdefault(typed_key, []).append(text_value)
+        return self.text_values[attribute_name]
+
+    def __get_typed_value_counts(self, attribute_name):
+        self.__get_text_values(attribute_name)
+        attribute_state = self.profile_state.attribute_states[attribute_name]
+        typed_values = [
+            np.nan if typed_key is NULL_VALUE else typed_key for typed_key in self.text_values[attribute_name]
+        ]
+        counts = [
+            sum(attribute_state.value_counts[text_value] for text_value in text_values)
+            for text_values in self.text_values[attribute_name].values()
+        ]
+        return pd.Series(counts, index=pd.Index(typed_values, dtype=object), dtype=np.int64, name=attribute_name)
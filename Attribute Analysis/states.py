@@ -0,0 +1,366 @@
+from collections import Counter
+from itertools import chain, islice
+import hashlib
+import io
+import json
+import os
+import pickle
+import numpy as np
+import pandas as pd
+from loaders import detect_csv_codec, find_csv_row_end, get_csv_separator_code, iterate_csv_row_ranges
+from results import RowGroups
+from rules import verdict_cache
+
+# Key of the missing values in the value counts, NaN can not be used as a dict key
+NULL_VALUE = None
+
+
+class AttributeState:
+    """Mergeable profile of one attribute, only ever holds one entry per distinct value"""
+
+    def __init__(self, attribute_name):
+        self.attribute_name = attribute_name
+        # Insertion order is the order of first appearance, like pandas.value_counts ties
+        self.value_counts = Counter()
+        self.verdicts = {}
+        self.index_values = {}
+        # Type pandas infers for the column, the typed values of the text values only change with it
+        self.typed_dtype = None
+
+    def update(self, values, index_values, business_rules):
+        chunk_value_counts = values.value_counts(dropna=False, sort=False)
+        invalid_values = []
+        for value, count in chunk_value_counts.items():
+            value = NULL_VALUE if pd.isnull(value) else value
+            self.value_counts[value] += count
+            if value not in self.verdicts:
+                self.verdicts[value] = all(
+                    verdict_cache.is_valid(business_rule, get_rule_value(value)) for business_rule in business_rules
+                )
+            if not self.verdicts[value]:
+                invalid_values.append(value)
+        self.add_index_values(values, index_values, invalid_values)
+
+    def add_index_values(self, values, index_values, tracked_values):
+        # The affected rows are only kept for the values a report lists, found from one factorization of the chunk
+        if not tracked_values:
+            return
+        row_groups = RowGroups(values)
+        for value in tracked_values:
+            row_positions = row_groups.get_row_positions(value)
+            if len(row_positions):
+                self.index_values.setdefault(value, []).append(index_values[row_positions])
+
+    def merge(self, attribute_state):
+        self.value_counts.update(attribute_state.value_counts)
+        for value, verdict in attribute_state.verdicts.items():
+            self.verdicts.setdefault(value, verdict)
+        for value, index_values in attribute_state.index_values.items():
+            self.index_values.setdefault(value, []).extend(index_values)
+        return self
+
+    def get_index_values(self, value):
+        if value not in self.index_values:
+            return np.array([], dtype=object)
+        return np.concatenate(self.index_values[value])
+
+
+class ProfileState:
+
+    def __init__(self, index_name, attribute_names=()):
+        self.index_name = index_name
+        self.number_of_rows = 0
+        self.attribute_states = {attribute_name: AttributeState(attribute_name) for attribute_name in attribute_names}
+
+    def update(self, data_frame, business_rules):
+        index_values = data_frame[self.index_name].values
+        for attribute_name, attribute_state in self.attribute_states.items():
+            attribute_state.update(data_frame[attribute_name], index_values, business_rules.get(attribute_name, []))
+        self.number_of_rows += data_frame.shape[0]
+
+    def merge(self, profile_state):
+        self.number_of_rows += profile_state.number_of_rows
+        for attribute_name, attribute_state in profile_state.attribute_states.items():
+            self.attribute_states.setdefault(attribute_name, AttributeState(attribute_name)).merge(attribute_state)
+        return self
+
+
+class ChunkedCSVProfiler:
+
+    def __init__(self, file_path, index_name, business_rules, encoding="utf-8", separator=";", chunk_size=500000,
+                 state_file_path=None, state_key=""):
+        self.file_path = file_path
+        self.index_name = index_name
+        self.business_rules = business_rules
+        self.encoding = encoding
+        self.separator = separator
+        self.chunk_size = chunk_size
+        self.state_file_path = state_file_path
+        self.state_key = json.dumps([state_key, index_name, encoding, separator])
+        self.attribute_names = [
+            attribute_name for attribute_name in business_rules if attribute_name != index_name
+        ]
+        self.codec, self.bom_length, self.code_unit = detect_csv_codec(file_path, encoding)
+        self.separator_code = get_csv_separator_code(separator, self.codec, self.code_unit) if self.code_unit else None
+        if self.separator_code is None:
+            # Rows can only be found by byte offsets with a separator of one code unit
+            self.code_unit = None
+        self.names = list(pd.read_csv(file_path, encoding=encoding, sep=separator, nrows=0).columns)
+
+    def profile(self):
+        if self.code_unit is None:
+            # Compressed files have no byte offsets to resume from, they are always profiled as a whole
+            profile_state = ProfileState(self.index_name, self.attribute_names)
+            self.profile_chunks(profile_state, self.read_chunks())
+            self.add_missing_index_values(profile_state)
+            return profile_state
+
+        file_size = os.path.getsize(self.file_path)
+        profile_state, start = self.__read_state(file_size)
+        if profile_state is None:
+            profile_state, start = ProfileState(self.index_name, self.attribute_names), self.get_rows_start()
+        else:
+            print("Resume Profile: {} rows, {} new bytes".format(profile_state.number_of_rows, file_size - start))
+        self.profile_chunks(profile_state, self.read_chunks(start, file_size))
+        self.add_missing_index_values(profile_state, start)
+        self.__write_state(profile_state, file_size)
+        return profile_state
+
+    def profile_shard(self, shard_number, number_of_shards):
+        """Profiles the rows of one of number_of_shards byte ranges, the shards are merged in shard order"""
+        if self.code_unit is None:
+            raise ValueError("'{}' can only be sharded by file".format(self.file_path))
+        profile_state = ProfileState(self.index_name, self.attribute_names)
+        file_size = os.path.getsize(self.file_path)
+        # The file is only scanned up to the end of this shard
+        row_range = next(islice(iterate_csv_row_ranges(
+            self.file_path, self.bom_length, self.code_unit, -(-(file_size - self.bom_length) // number_of_shards),
+            self.separator_code
+        ), shard_number, None), None)
+        if row_range is not None:
+            start, end = row_range
+            # The first range starts with the header row
+            self.profile_chunks(profile_state, self.read_chunks(max(start, self.get_rows_start()), end))
+        return profile_state
+
+    def get_rows_start(self):
+        file_size = os.path.getsize(self.file_path)
+        return find_csv_row_end(
+            self.file_path, self.code_unit, self.bom_length, file_size, self.separator_code
+        ) or file_size
+
+    def read_all_chunks(self):
+        if self.code_unit is None:
+            return self.read_chunks()
+        return self.read_chunks(self.get_rows_start(), os.path.getsize(self.file_path))
+
+    def read_chunks(self, start=None, end=None):
+        # Attribute values are read as text and typed once all chunks are known,
+        # a chunk on its own can infer a different type than the whole column
+        read_csv_arguments = {
+            'sep' : self.separator,
+            'chunksize' : self.chunk_size,
+            'usecols' : [self.index_name] + self.attribute_names,
+            'dtype' : {attribute_name: str for attribute_name in self.attribute_names}
+        }
+        if start is None:
+            return pd.read_csv(self.file_path, encoding=self.encoding, **read_csv_arguments)
+        if start >= end:
+            return []
+        csv_file = io.TextIOWrapper(
+            io.BufferedReader(FileRangeReader(self.file_path, start, end)), encoding=self.codec, newline=''
+        )
+        return pd.read_csv(csv_file, header=None, names=self.names, **read_csv_arguments)
+
+    def profile_chunks(self, profile_state, chunks):
+        for chunk_number, data_frame in enumerate(chunks, 1):
+            profile_state.update(data_frame, self.business_rules)
+            print("Profile Chunk {}: {} rows".format(chunk_number, profile_state.number_of_rows))
+
+    def add_missing_index_values(self, profile_state, start=None):
+        """Rows of values first seen after the byte offset start are only looked up from there on"""
+        add_missing_index_values(
+            profile_state, self.business_rules, self.read_all_chunks,
+            None if start is None else lambda: self.read_chunks(start, os.path.getsize(self.file_path))
+        )
+
+    def __read_state(self, file_size):
+        if not self.state_file_path or not os.path.isfile(self.state_file_path):
+            return None, None
+        with open(self.state_file_path, 'rb') as state_file:
+            state = pickle.load(state_file)
+        if state['state_key'] != self.state_key:
+            print("Profile State: configuration changed, profiling the whole file")
+            return None, None
+        if file_size < state['offset'] or self.__get_fingerprint(state['offset']) != state['fingerprint']:
+            print("Profile State: '{}' was rewritten, profiling the whole file".format(self.file_path))
+            return None, None
+        return state['profile_state'], state['offset']
+
+    def __write_state(self, profile_state, offset):
+        if not self.state_file_path:
+            return
+        state = {
+            'state_key' : self.state_key,
+            'offset' : offset,
+            'fingerprint' : self.__get_fingerprint(offset),
+            'profile_state' : profile_state
+        }
+        os.makedirs(os.path.dirname(self.state_file_path) or '.', exist_ok=True)
+        temporary_file_path = self.state_file_path + ".tmp"
+        with open(temporary_file_path, 'wb') as state_file:
+            pickle.dump(state, state_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_file_path, self.state_file_path)
+
+    def __get_fingerprint(self, offset, sample_size=1024 * 1024):
+        # The start of the file and the bytes before the offset stand for the profiled content, the
+        # offset has to end a row so that appended rows start a new one
+        item_size = np.dtype(self.code_unit).itemsize
+        with open(self.file_path, 'rb') as csv_file:
+            head = csv_file.read(min(sample_size, offset))
+            csv_file.seek(max(offset - sample_size, 0))
+            tail = csv_file.read(offset - max(offset - sample_size, 0))
+        ends_row = offset < item_size or np.frombuffer(tail[-item_size:], dtype=self.code_unit)[0] == ord('\n')
+        return [hashlib.sha1(head).hexdigest(), hashlib.sha1(tail).hexdigest(), bool(ends_row)]
+
+
+class MultiFileChunkedCSVProfiler:
+
+    def __init__(self, chunked_csv_profilers):
+        self.chunked_csv_profilers = chunked_csv_profilers
+
+    def profile(self):
+        profile_state = self.profile_shard(0, 1)
+        self.add_missing_index_values(profile_state)
+        return profile_state
+
+    def profile_shard(self, shard_number, number_of_shards):
+        """Profiles one of number_of_shards contiguous blocks of files, the shards are merged in shard order"""
+        if not self.chunked_csv_profilers:
+            raise FileNotFoundError("No CSV files to profile")
+        profile_state = ProfileState(self.chunked_csv_profilers[0].index_name, self.chunked_csv_profilers[0].attribute_names)
+        number_of_files = len(self.chunked_csv_profilers)
+        for chunked_csv_profiler in self.chunked_csv_profilers[
+                shard_number * number_of_files // number_of_shards:(shard_number + 1) * number_of_files // number_of_shards]:
+            print("Profile File: '{}'".format(chunked_csv_profiler.file_path))
+            chunked_csv_profiler.profile_chunks(profile_state, chunked_csv_profiler.read_all_chunks())
+        return profile_state
+
+    def add_missing_index_values(self, profile_state):
+        add_missing_index_values(
+            profile_state, self.chunked_csv_profilers[0].business_rules,
+            lambda: chain.from_iterable(
+                chunked_csv_profiler.read_all_chunks() for chunked_csv_profiler in self.chunked_csv_profilers
+            )
+        )
+
+
+def add_missing_index_values(profile_state, business_rules, read_chunks, read_new_chunks=None):
+    """
+    A value valid as text can be invalid once typed (e.g. "1" read as 1.0), the rows of those values are collected
+    in a second pass over read_chunks() and tracked from now on. A resumed profile state passes the chunks it
+    profiled in this run as read_new_chunks(), they hold all rows of the values first seen in this run. The values
+    of earlier runs only change their typed value if the column type changes, only then is read_chunks() used.
+    """
+    missing_values = {}
+    has_changed_type = False
+    for attribute_name, attribute_state in profile_state.attribute_states.items():
+        typed_values = get_typed_values(list(attribute_state.value_counts), attribute_state.value_counts[NULL_VALUE] > 0)
+        typed_dtype = pd.api.types.infer_dtype(list(typed_values.values()), skipna=True)
+        attribute_business_rules = business_rules.get(attribute_name, [])
+        missing_values[attribute_name] = [
+            value for value, typed_value in typed_values.items()
+            if attribute_state.verdicts[value]
+            and not all(
+                verdict_cache.is_valid(business_rule, get_rule_value(typed_value))
+                for business_rule in attribute_business_rules
+            )
+        ]
+        # States written before the column type was kept count as changed
+        if missing_values[attribute_name] and getattr(attribute_state, 'typed_dtype', None) != typed_dtype:
+            has_changed_type = True
+        attribute_state.typed_dtype = typed_dtype
+        for value in missing_values[attribute_name]:
+            attribute_state.verdicts[value] = False
+            attribute_state.index_values.pop(value, None)
+    if not any(missing_values.values()):
+        return
+    for data_frame in (read_chunks() if read_new_chunks is None or has_changed_type else read_new_chunks()):
+        index_values = data_frame[profile_state.index_name].values
+        for attribute_name, values in missing_values.items():
+            if values:
+                profile_state.attribute_states[attribute_name].add_index_values(
+                    data_frame[attribute_name], index_values, values
+                )
+
+
+def write_partial_profile_state(file_path, profile_state, shard_number, number_of_shards, state_key):
+    partial_profile_state = {
+        'state_key' : state_key,
+        'shard_number' : shard_number,
+        'number_of_shards' : number_of_shards,
+        'profile_state' : profile_state
+    }
+    os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+    with open(file_path + ".tmp", 'wb') as partial_file:
+        pickle.dump(partial_profile_state, partial_file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(file_path + ".tmp", file_path)
+
+
+def read_partial_profile_states(file_paths, state_key):
+    """Merges the partial results of all shards of one job in shard order"""
+    partial_profile_states = []
+    for file_path in file_paths:
+        with open(file_path, 'rb') as partial_file:
+            partial_profile_states.append(pickle.load(partial_file))
+    if any(partial_profile_state['state_key'] != state_key for partial_profile_state in partial_profile_states):
+        raise ValueError("Partial results were profiled with other attribute settings")
+    partial_profile_states.sort(key=lambda partial_profile_state: partial_profile_state['shard_number'])
+    shard_numbers = [partial_profile_state['shard_number'] for partial_profile_state in partial_profile_states]
+    number_of_shards = {partial_profile_state['number_of_shards'] for partial_profile_state in partial_profile_states}
+    if len(number_of_shards) != 1 or shard_numbers != list(range(number_of_shards.pop())):
+        raise ValueError("Partial results are incomplete, got shards {}".format(shard_numbers))
+    profile_state = partial_profile_states[0]['profile_state']
+    for partial_profile_state in partial_profile_states[1:]:
+        profile_state.merge(partial_profile_state['profile_state'])
+    return profile_state
+
+
+class FileRangeReader(io.RawIOBase):
+
+    def __init__(self, file_path, start, end):
+        self.file = open(file_path, 'rb')
+        self.file.seek(start)
+        self.remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        number_of_bytes = self.file.readinto(memoryview(buffer)[:min(len(buffer), self.remaining)])
+        self.remaining -= number_of_bytes
+        return number_of_bytes
+
+    def close(self):
+        self.file.close()
+        super(FileRangeReader, self).close()
+
+
+def get_rule_value(value):
+    return np.nan if value is NULL_VALUE else value
+
+
+def get_typed_values(values, has_null_values):
+    """Maps text values to the values pandas.read_csv infers for a column holding exactly these values"""
+    text_values = [value for value in values if value is not NULL_VALUE]
+    typed_values = {value: np.nan for value in values if value is NULL_VALUE}
+    if not text_values:
+        return typed_values
+    # Type inference only depends on the distinct values, parsing them once again gives the column type
+    typed_column = pd.read_csv(
+        io.StringIO(pd.Series(text_values).to_csv(index=False, header=False)), header=None, names=['value']
+    )['value']
+    if has_null_values and typed_column.dtype.kind in 'iub':
+        typed_column = typed_column.astype(float if typed_column.dtype.kind in 'iu' else object)
+    typed_values.update(zip(text_values, typed_column.tolist()))
+    return typed_values
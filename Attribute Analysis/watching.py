@@ -0,0 +1,32 @@
+import os
+import time
+
+
+class AttributeSettingsWatcher:
+    """Polls the attribute settings directory, a file counts as changed when its modification time or size changes"""
+
+    def __init__(self, attribute_settings_location, interval=1.0):
+        self.attribute_settings_location = attribute_settings_location
+        self.interval = interval
+        self.file_states = {}
+
+    def poll(self):
+        file_states = {}
+        for file_name in sorted(os.listdir(self.attribute_settings_location)):
+            file_path = os.path.join(self.attribute_settings_location, file_name)
+            if os.path.isfile(file_path) and file_name.endswith('.json'):
+                file_stat = os.stat(file_path)
+                file_states[file_name] = (file_stat.st_mtime_ns, file_stat.st_size)
+        changed_file_names = [
+            file_name for file_name, file_state in file_states.items() if self.file_states.get(file_name) != file_state
+        ]
+        removed_file_names = [file_name for file_name in self.file_states if file_name not in file_states]
+        self.file_states = file_states
+        return changed_file_names, removed_file_names
+
+    def watch(self):
+        while True:
+            changed_file_names, removed_file_names = self.poll()
+            if changed_file_names or removed_file_names:
+                yield changed_file_names, removed_file_names
+            time.sleep(self.interval)
@@ -1,14 +1,54 @@
-﻿SOURCE_CSV_FILE_PATH = 'Daten/FD_Incidents_2016_2017_Archiviert_EOC_EOR_separated.csv'
+﻿import codecs
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from multiprocessing import Pool
+
+SOURCE_CSV_FILE_PATH = 'Daten/FD_Incidents_2016_2017_Archiviert_EOC_EOR_separated.csv'
 TARGET_CSV_FILE_PATH = 'Daten/FD_Incidents_2016_2017_Archiviert_for_Python.csv'
 SOURCE_ROW_DELIMITER = '<EOR>'
 SOURCE_COL_DELIMITER = '<EOC>'
 TARGET_ROW_DELIMITER = '\n'
 TARGET_COL_DELIMITER = ';'
 QUOTATION_DELIMITER = '""'
+# 'csv', 'parquet' or 'feather'; columnar formats need pandas and pyarrow
+TARGET_FILE_FORMAT = 'csv'
+TARGET_ENCODING = 'utf16'
+# Optional sidecar mapping every record to its byte offset and length in the target CSV
+TARGET_INDEX_FILE_PATH = None
+INDEX_KEY_COLUMN = 'FullId'
+# Set to convert incrementally: only records appended since the last run are converted
+CHECKPOINT_FILE_PATH = None
+# Rows whose column count differs from the header are written here instead of the target
+REJECT_FILE_PATH = 'Daten/FD_Incidents_2016_2017_Archiviert_rejected.csv'
+PROGRESS_REPORT_INTERVAL = 5
+SOURCE_BUFFER_SIZE = 4 * 1024 * 1024
+NUMBER_OF_WORKERS = os.cpu_count() or 1
+PARALLEL_CHUNK_SIZE = 64 * 1024 * 1024
+
+def delimited(file, delimiter='\n', buffer_size=None):
+	if not buffer_size:
+		file_content = file.read()
+		return (row for row in file_content.split(delimiter))
+	return delimited_buffered(file, delimiter, buffer_size)
 
-def delimited(file, delimiter='\n'):
-	file_content = file.read()
-	return (row for row in file_content.split(delimiter))
+def delimited_buffered(file, delimiter, buffer_size):
+	# Reads at most buffer_size characters at a time and carries the unterminated
+	# tail over to the next buffer, so a delimiter split across two reads is still
+	# found and memory use stays bounded by the longest row.
+	remainder = ''
+	while True:
+		buffer = file.read(buffer_size)
+		if not buffer:
+			break
+		rows = (remainder + buffer).split(delimiter)
+		remainder = rows.pop()
+		for row in rows:
+			yield row
+	yield remainder
 		
 def convert_to_valid_csv_column(
 		source_column, 	
@@ -36,17 +76,226 @@ def convert_to_valid_csv_row(
 	):
 	if source_row == None or source_row == '': 
 		return None
-	target_row = ''
-	source_columns = source_row.split(source_col_delimiter)
-	for source_column in source_columns:
-		target_column = convert_to_valid_csv_column(
+	target_columns = [
+		convert_to_valid_csv_column(
 			source_column, 
 			target_row_delimiter, 
 			target_col_delimiter, 
 			quotation_delimiter
-		) 
-		target_row += (target_col_delimiter if target_row != '' else '') + target_column
-	return target_row + target_row_delimiter
+		)
+		for source_column in source_row.split(source_col_delimiter)
+	]
+	return target_col_delimiter.join(target_columns) + target_row_delimiter
+
+def detect_source_codec(source_csv_file_path):
+	with open(source_csv_file_path, 'rb') as source_csv_file:
+		bom = source_csv_file.read(2)
+	if bom == codecs.BOM_UTF16_LE:
+		return 'utf-16-le', len(bom)
+	if bom == codecs.BOM_UTF16_BE:
+		return 'utf-16-be', len(bom)
+	return ('utf-16-le' if sys.byteorder == 'little' else 'utf-16-be'), 0
+
+def read_header_row(source_csv_file_path, source_row_delimiter, buffer_size=SOURCE_BUFFER_SIZE):
+	with open(source_csv_file_path, encoding='utf16') as source_csv_file:
+		return next(delimited(source_csv_file, source_row_delimiter, buffer_size))
+
+def get_key_column_idx(header_row, source_col_delimiter, key_column):
+	return header_row.split(source_col_delimiter).index(key_column)
+
+def has_valid_number_of_columns(source_row, source_col_delimiter, number_of_columns):
+	return number_of_columns is None or source_row.count(source_col_delimiter) + 1 == number_of_columns
+
+def get_row_key(source_row, source_col_delimiter, key_column_idx):
+	source_columns = source_row.split(source_col_delimiter, key_column_idx + 1)
+	return source_columns[key_column_idx] if len(source_columns) > key_column_idx else ''
+
+def get_encoded_length(target_row, target_encoding):
+	# Text mode writes os.linesep for every '\n' and the codec may prepend a BOM
+	# to each separately encoded string, both must be accounted for.
+	if os.linesep != '\n':
+		target_row = target_row.replace('\n', os.linesep)
+	return len(target_row.encode(target_encoding)) - len(''.encode(target_encoding))
+
+class RowIndexWriter:
+
+	def __init__(self, index_file_path, key_column, target_encoding, row_number=None, offset=None):
+		if row_number is None:
+			self.index_file = open(index_file_path, 'w', encoding='utf-8', newline='')
+			self.index_writer = csv.writer(self.index_file, delimiter=';', lineterminator='\n')
+			self.index_writer.writerow([key_column, 'row', 'offset', 'length'])
+			# The first appended row is the header, it only advances the offset
+			self.row_number = -1
+			self.offset = len(''.encode(target_encoding))
+		else:
+			self.index_file = open(index_file_path, 'a', encoding='utf-8', newline='')
+			self.index_writer = csv.writer(self.index_file, delimiter=';', lineterminator='\n')
+			self.row_number = row_number
+			self.offset = offset
+
+	def append(self, key, length):
+		if self.row_number >= 0:
+			self.index_writer.writerow([key, self.row_number, self.offset, length])
+		self.row_number += 1
+		self.offset += length
+
+	def flush(self):
+		self.index_file.flush()
+
+	def close(self):
+		self.index_file.close()
+
+class ConversionProgress:
+
+	def __init__(self, total_bytes, report_interval=PROGRESS_REPORT_INTERVAL):
+		self.total_bytes = total_bytes
+		self.report_interval = report_interval
+		self.number_of_rows = 0
+		self.number_of_rejected_rows = 0
+		self.processed_bytes = 0
+		self.start_time = time.monotonic()
+		self.last_report_time = self.start_time
+
+	def update(self, number_of_rows, number_of_rejected_rows, processed_bytes):
+		self.number_of_rows += number_of_rows
+		self.number_of_rejected_rows += number_of_rejected_rows
+		self.processed_bytes = processed_bytes
+		now = time.monotonic()
+		if now - self.last_report_time >= self.report_interval:
+			self.last_report_time = now
+			self.report(now)
+
+	def report(self, now):
+		elapsed_seconds = max(now - self.start_time, 1e-9)
+		bytes_per_second = self.processed_bytes / elapsed_seconds
+		remaining_seconds = (
+			(self.total_bytes - self.processed_bytes) / bytes_per_second if bytes_per_second else 0
+		)
+		print ("Processed {rows} rows ({percentage:.1f} %) | {rows_per_second:.0f} rows/s | {mb_per_second:.1f} MB/s | ETA {eta}".format(
+			rows=self.number_of_rows,
+			percentage=self.processed_bytes / self.total_bytes * 100 if self.total_bytes else 100,
+			rows_per_second=self.number_of_rows / elapsed_seconds,
+			mb_per_second=bytes_per_second / 1024 / 1024,
+			eta=format_duration(remaining_seconds)
+		))
+
+	def summary(self, reject_file_path=None):
+		elapsed_seconds = max(time.monotonic() - self.start_time, 1e-9)
+		print ("Converted {rows} rows, {mb:.1f} MB in {duration} ({rows_per_second:.0f} rows/s, {mb_per_second:.1f} MB/s)".format(
+			rows=self.number_of_rows - self.number_of_rejected_rows,
+			mb=self.processed_bytes / 1024 / 1024,
+			duration=format_duration(elapsed_seconds),
+			rows_per_second=self.number_of_rows / elapsed_seconds,
+			mb_per_second=self.processed_bytes / elapsed_seconds / 1024 / 1024
+		))
+		if self.number_of_rejected_rows:
+			print ("Rejected {rows} rows with an invalid number of columns: {reject_file_path}".format(
+				rows=self.number_of_rejected_rows,
+				reject_file_path=reject_file_path
+			))
+
+def format_duration(seconds):
+	minutes, seconds = divmod(int(seconds), 60)
+	hours, minutes = divmod(minutes, 60)
+	return "{:d}:{:02d}:{:02d}".format(hours, minutes, seconds)
+
+def find_next_row_boundary(source_csv_file, position, encoded_row_delimiter, data_offset, buffer_size=SOURCE_BUFFER_SIZE):
+	# Returns the byte offset directly behind the first row delimiter at or after
+	# position. Matches are only accepted on UTF-16 code unit boundaries.
+	position -= (position - data_offset) % 2
+	overlap = len(encoded_row_delimiter) - 2
+	while True:
+		source_csv_file.seek(position)
+		buffer = source_csv_file.read(buffer_size)
+		if len(buffer) < len(encoded_row_delimiter):
+			return None
+		match = buffer.find(encoded_row_delimiter)
+		while match != -1 and match % 2 != 0:
+			match = buffer.find(encoded_row_delimiter, match + 1)
+		if match != -1:
+			return position + match + len(encoded_row_delimiter)
+		position += len(buffer) - overlap
+
+def find_last_row_boundary(source_csv_file, end, encoded_row_delimiter, data_offset, buffer_size=SOURCE_BUFFER_SIZE):
+	# Returns the byte offset directly behind the last row delimiter before end,
+	# searching backwards. Matches are only accepted on UTF-16 code unit boundaries.
+	end -= (end - data_offset) % 2
+	overlap = len(encoded_row_delimiter) - 2
+	while end > data_offset:
+		start = max(data_offset, end - buffer_size)
+		source_csv_file.seek(start)
+		buffer = source_csv_file.read(end - start)
+		match = buffer.rfind(encoded_row_delimiter)
+		while match != -1 and match % 2 != 0:
+			match = buffer.rfind(encoded_row_delimiter, 0, match + len(encoded_row_delimiter) - 1)
+		if match != -1:
+			return start + match + len(encoded_row_delimiter)
+		if start == data_offset:
+			break
+		end = start + overlap
+	return None
+
+def split_into_row_ranges(source_csv_file_path, source_row_delimiter, chunk_size, start=None, end=None):
+	codec, data_offset = detect_source_codec(source_csv_file_path)
+	encoded_row_delimiter = source_row_delimiter.encode(codec)
+	start = data_offset if start is None else start
+	end = os.path.getsize(source_csv_file_path) if end is None else end
+	boundaries = [start]
+	with open(source_csv_file_path, 'rb') as source_csv_file:
+		position = start + chunk_size
+		while position < end:
+			position = find_next_row_boundary(source_csv_file, position, encoded_row_delimiter, data_offset)
+			if position is None or position >= end:
+				break
+			boundaries.append(position)
+			position += chunk_size
+	boundaries.append(end)
+	return codec, list(zip(boundaries[:-1], boundaries[1:]))
+
+def read_source_range(source_csv_file_path, codec, start, end):
+	with open(source_csv_file_path, 'rb') as source_csv_file:
+		source_csv_file.seek(start)
+		source_content = source_csv_file.read(end - start).decode(codec)
+	# Same newline translation the text mode reader applies in the sequential path
+	return source_content.replace('\r\n', '\n').replace('\r', '\n')
+
+def convert_source_range(
+		source_csv_file_path,
+		codec,
+		start,
+		end,
+		source_row_delimiter,
+		source_col_delimiter,
+		target_row_delimiter,
+		target_col_delimiter,
+		quotation_delimiter,
+		target_encoding,
+		key_column_idx=None,
+		number_of_columns=None
+	):
+	source_content = read_source_range(source_csv_file_path, codec, start, end)
+	target_rows = []
+	row_index_entries = []
+	rejected_rows = []
+	for source_row in source_content.split(source_row_delimiter):
+		if source_row and not has_valid_number_of_columns(source_row, source_col_delimiter, number_of_columns):
+			rejected_rows.append(source_row + source_row_delimiter)
+			continue
+		target_row = convert_to_valid_csv_row(
+			source_row, 
+			source_col_delimiter, 
+			target_row_delimiter,
+			target_col_delimiter,
+			quotation_delimiter
+		)
+		if target_row:
+			target_rows.append(target_row)
+			if key_column_idx is not None:
+				row_index_entries.append((
+					get_row_key(source_row, source_col_delimiter, key_column_idx),
+					get_encoded_length(target_row, target_encoding)
+				))
+	return ''.join(target_rows), row_index_entries, ''.join(rejected_rows), len(target_rows), len(rejected_rows)
 		
 def convert_to_valid_csv(
 		source_csv_file_path, 
@@ -55,15 +304,84 @@ def convert_to_valid_csv(
 		source_col_delimiter, 
 		target_row_delimiter,
 		target_col_delimiter,
-		quotation_delimiter
+		quotation_delimiter,
+		buffer_size=SOURCE_BUFFER_SIZE,
+		number_of_workers=NUMBER_OF_WORKERS,
+		chunk_size=PARALLEL_CHUNK_SIZE,
+		target_encoding=TARGET_ENCODING,
+		target_file_format=TARGET_FILE_FORMAT,
+		index_file_path=TARGET_INDEX_FILE_PATH,
+		index_key_column=INDEX_KEY_COLUMN,
+		checkpoint_file_path=CHECKPOINT_FILE_PATH,
+		reject_file_path=REJECT_FILE_PATH
 	):
+	if target_file_format != 'csv':
+		return convert_to_columnar_file(
+			source_csv_file_path, 
+			target_csv_file_path, 
+			source_row_delimiter, 
+			source_col_delimiter, 
+			target_row_delimiter,
+			target_col_delimiter,
+			quotation_delimiter,
+			buffer_size,
+			number_of_workers,
+			chunk_size,
+			target_file_format,
+			reject_file_path
+		)
+	if checkpoint_file_path:
+		return convert_to_valid_csv_incremental(
+			source_csv_file_path, 
+			target_csv_file_path, 
+			source_row_delimiter, 
+			source_col_delimiter, 
+			target_row_delimiter,
+			target_col_delimiter,
+			quotation_delimiter,
+			checkpoint_file_path,
+			number_of_workers,
+			chunk_size,
+			target_encoding,
+			index_file_path,
+			index_key_column,
+			reject_file_path
+		)
+	if number_of_workers > 1:
+		return convert_to_valid_csv_parallel(
+			source_csv_file_path, 
+			target_csv_file_path, 
+			source_row_delimiter, 
+			source_col_delimiter, 
+			target_row_delimiter,
+			target_col_delimiter,
+			quotation_delimiter,
+			number_of_workers,
+			chunk_size,
+			target_encoding,
+			index_file_path,
+			index_key_column,
+			reject_file_path
+		)
+	header_row = read_header_row(source_csv_file_path, source_row_delimiter)
+	number_of_columns = header_row.count(source_col_delimiter) + 1 if reject_file_path else None
+	row_index_writer = None
+	if index_file_path:
+		key_column_idx = get_key_column_idx(header_row, source_col_delimiter, index_key_column)
+		row_index_writer = RowIndexWriter(index_file_path, index_key_column, target_encoding)
+	reject_file = open(reject_file_path, "w", encoding='utf16') if reject_file_path else None
+	progress = ConversionProgress(os.path.getsize(source_csv_file_path))
 	source_csv_file = open(source_csv_file_path, encoding='utf16')
-	target_csv_file = open(target_csv_file_path, "w", encoding='utf16')
-	source_rows = delimited(source_csv_file, source_row_delimiter)
-	row_idx = 0
+	target_csv_file = open(target_csv_file_path, "w", encoding=target_encoding)
+	source_rows = delimited(source_csv_file, source_row_delimiter, buffer_size)
 	for source_row in source_rows:
-		row_idx+=1
-		print ("Processing Row: " + str(row_idx))
+		if not source_row:
+			continue
+		if not has_valid_number_of_columns(source_row, source_col_delimiter, number_of_columns):
+			reject_file.write(source_row + source_row_delimiter)
+			progress.update(1, 1, source_csv_file.buffer.tell())
+			continue
+		progress.update(1, 0, source_csv_file.buffer.tell())
 		target_row = convert_to_valid_csv_row(
 			source_row, 
 			source_col_delimiter, 
@@ -73,16 +391,308 @@ def convert_to_valid_csv(
 		)
 		if target_row:
 			target_csv_file.write(target_row)
+			if row_index_writer:
+				row_index_writer.append(
+					get_row_key(source_row, source_col_delimiter, key_column_idx),
+					get_encoded_length(target_row, target_encoding)
+				)
 	target_csv_file.close()
 	source_csv_file.close()
-		
-convert_to_valid_csv(
-	SOURCE_CSV_FILE_PATH, 
-	TARGET_CSV_FILE_PATH, 
-	SOURCE_ROW_DELIMITER, 
-	SOURCE_COL_DELIMITER, 
-	TARGET_ROW_DELIMITER,
-	TARGET_COL_DELIMITER,
-	QUOTATION_DELIMITER
-)
+	if row_index_writer:
+		row_index_writer.close()
+	if reject_file:
+		reject_file.close()
+	progress.summary(reject_file_path)
+
+def convert_to_valid_csv_parallel(
+		source_csv_file_path, 
+		target_csv_file_path, 
+		source_row_delimiter, 
+		source_col_delimiter, 
+		target_row_delimiter,
+		target_col_delimiter,
+		quotation_delimiter,
+		number_of_workers,
+		chunk_size,
+		target_encoding,
+		index_file_path=None,
+		index_key_column=INDEX_KEY_COLUMN,
+		reject_file_path=None
+	):
+	codec, row_ranges = split_into_row_ranges(source_csv_file_path, source_row_delimiter, chunk_size)
+	header_row = read_header_row(source_csv_file_path, source_row_delimiter)
+	number_of_columns = header_row.count(source_col_delimiter) + 1 if reject_file_path else None
+	key_column_idx = None
+	row_index_writer = None
+	if index_file_path:
+		key_column_idx = get_key_column_idx(header_row, source_col_delimiter, index_key_column)
+		row_index_writer = RowIndexWriter(index_file_path, index_key_column, target_encoding)
+	reject_file = open(reject_file_path, "w", encoding='utf16') if reject_file_path else None
+	progress = ConversionProgress(os.path.getsize(source_csv_file_path))
+	target_csv_file = open(target_csv_file_path, "w", encoding=target_encoding)
+	converted_ranges = convert_source_ranges(
+		source_csv_file_path,
+		codec,
+		row_ranges,
+		source_row_delimiter,
+		source_col_delimiter,
+		target_row_delimiter,
+		target_col_delimiter,
+		quotation_delimiter,
+		target_encoding,
+		key_column_idx,
+		number_of_columns,
+		number_of_workers
+	)
+	for converted_range, (_, range_end) in zip(converted_ranges, row_ranges):
+		number_of_rows, number_of_rejected_rows = write_converted_range(
+			converted_range, target_csv_file, row_index_writer, reject_file
+		)
+		progress.update(number_of_rows, number_of_rejected_rows, range_end)
+	target_csv_file.close()
+	if row_index_writer:
+		row_index_writer.close()
+	if reject_file:
+		reject_file.close()
+	progress.summary(reject_file_path)
+
+def convert_source_ranges(
+		source_csv_file_path,
+		codec,
+		row_ranges,
+		source_row_delimiter,
+		source_col_delimiter,
+		target_row_delimiter,
+		target_col_delimiter,
+		quotation_delimiter,
+		target_encoding,
+		key_column_idx,
+		number_of_columns,
+		number_of_workers
+	):
+	range_arguments = [
+		(
+			source_csv_file_path,
+			codec,
+			start,
+			end,
+			source_row_delimiter,
+			source_col_delimiter,
+			target_row_delimiter,
+			target_col_delimiter,
+			quotation_delimiter,
+			target_encoding,
+			key_column_idx,
+			number_of_columns
+		)
+		for start, end in row_ranges
+	]
+	if number_of_workers <= 1:
+		for arguments in range_arguments:
+			yield convert_source_range(*arguments)
+		return
+	with Pool(number_of_workers) as pool:
+		# At most two ranges per worker are in flight, converted ranges are
+		# yielded strictly in source order.
+		pending_ranges = deque()
+		for arguments in range_arguments:
+			pending_ranges.append(pool.apply_async(convert_source_range, arguments))
+			if len(pending_ranges) >= 2 * number_of_workers:
+				yield pending_ranges.popleft().get()
+		while pending_ranges:
+			yield pending_ranges.popleft().get()
+
+def convert_to_valid_csv_incremental(
+		source_csv_file_path, 
+		target_csv_file_path, 
+		source_row_delimiter, 
+		source_col_delimiter, 
+		target_row_delimiter,
+		target_col_delimiter,
+		quotation_delimiter,
+		checkpoint_file_path,
+		number_of_workers,
+		chunk_size,
+		target_encoding,
+		index_file_path=None,
+		index_key_column=INDEX_KEY_COLUMN,
+		reject_file_path=None
+	):
+	# Only records terminated by a row delimiter are converted, a trailing record
+	# that is still being appended to the source is picked up by the next run.
+	codec, data_offset = detect_source_codec(source_csv_file_path)
+	encoded_row_delimiter = source_row_delimiter.encode(codec)
+	checkpoint = read_checkpoint(checkpoint_file_path)
+	with open(source_csv_file_path, 'rb') as source_csv_file:
+		if checkpoint:
+			verify_checkpoint(checkpoint, source_csv_file, encoded_row_delimiter, index_file_path)
+		end = find_last_row_boundary(
+			source_csv_file, os.path.getsize(source_csv_file_path), encoded_row_delimiter, data_offset
+		)
+	if checkpoint:
+		# Anything behind the checkpoint stems from an interrupted run
+		truncate_file(target_csv_file_path, checkpoint['target_size'])
+		if index_file_path:
+			truncate_file(index_file_path, checkpoint['index_size'])
+		if reject_file_path and os.path.isfile(reject_file_path):
+			truncate_file(reject_file_path, checkpoint['reject_size'] or 0)
+	start = checkpoint['source_offset'] if checkpoint else data_offset
+	if end is None or end <= start:
+		print ("No new records to convert")
+		return
+	header_row = read_header_row(source_csv_file_path, source_row_delimiter)
+	number_of_columns = header_row.count(source_col_delimiter) + 1 if reject_file_path else None
+	key_column_idx = None
+	row_index_writer = None
+	if index_file_path:
+		key_column_idx = get_key_column_idx(header_row, source_col_delimiter, index_key_column)
+	reject_file = None
+	if checkpoint:
+		target_csv_file = open(target_csv_file_path, "a", encoding=target_encoding)
+		if reject_file_path:
+			reject_file = open(reject_file_path, "a", encoding='utf16')
+		if index_file_path:
+			row_index_writer = RowIndexWriter(
+				index_file_path, index_key_column, target_encoding, checkpoint['row_number'], checkpoint['target_size']
+			)
+	else:
+		target_csv_file = open(target_csv_file_path, "w", encoding=target_encoding)
+		if index_file_path:
+			row_index_writer = RowIndexWriter(index_file_path, index_key_column, target_encoding)
+		if reject_file_path:
+			reject_file = open(reject_file_path, "w", encoding='utf16')
+	progress = ConversionProgress(end - start)
+	_, row_ranges = split_into_row_ranges(source_csv_file_path, source_row_delimiter, chunk_size, start, end)
+	converted_ranges = convert_source_ranges(
+		source_csv_file_path,
+		codec,
+		row_ranges,
+		source_row_delimiter,
+		source_col_delimiter,
+		target_row_delimiter,
+		target_col_delimiter,
+		quotation_delimiter,
+		target_encoding,
+		key_column_idx,
+		number_of_columns,
+		number_of_workers
+	)
+	for converted_range, (_, range_end) in zip(converted_ranges, row_ranges):
+		number_of_rows, number_of_rejected_rows = write_converted_range(
+			converted_range, target_csv_file, row_index_writer, reject_file
+		)
+		target_csv_file.flush()
+		if row_index_writer:
+			row_index_writer.flush()
+		if reject_file:
+			reject_file.flush()
+		write_checkpoint(checkpoint_file_path, {
+			'source_csv_file_path' : source_csv_file_path,
+			'source_offset' : range_end,
+			'target_size' : os.path.getsize(target_csv_file_path),
+			'index_size' : os.path.getsize(index_file_path) if row_index_writer else None,
+			'reject_size' : os.path.getsize(reject_file_path) if reject_file else None,
+			'row_number' : row_index_writer.row_number if row_index_writer else None
+		})
+		progress.update(number_of_rows, number_of_rejected_rows, range_end - start)
+	target_csv_file.close()
+	if row_index_writer:
+		row_index_writer.close()
+	if reject_file:
+		reject_file.close()
+	progress.summary(reject_file_path)
+
+def read_checkpoint(checkpoint_file_path):
+	if not os.path.isfile(checkpoint_file_path):
+		return None
+	with open(checkpoint_file_path, encoding='utf-8') as checkpoint_file:
+		return json.load(checkpoint_file)
+
+def write_checkpoint(checkpoint_file_path, checkpoint):
+	# Replaced atomically, an interrupted run always leaves a consistent checkpoint
+	with open(checkpoint_file_path + '.tmp', 'w', encoding='utf-8') as checkpoint_file:
+		json.dump(checkpoint, checkpoint_file)
+	os.replace(checkpoint_file_path + '.tmp', checkpoint_file_path)
+
+def verify_checkpoint(checkpoint, source_csv_file, encoded_row_delimiter, index_file_path):
+	source_offset = checkpoint['source_offset']
+	source_csv_file.seek(source_offset - len(encoded_row_delimiter))
+	if source_csv_file.read(len(encoded_row_delimiter)) != encoded_row_delimiter:
+		raise ValueError(
+			"Source file does not continue the checkpointed conversion at byte {}, "
+			"remove the checkpoint to run a full conversion".format(source_offset)
+		)
+	if index_file_path and checkpoint['index_size'] is None:
+		raise ValueError("Checkpointed conversion has no row index, remove the checkpoint to run a full conversion")
+
+def truncate_file(file_path, size):
+	with open(file_path, 'r+b') as file:
+		file.truncate(size)
+
+def write_converted_range(converted_range, target_csv_file, row_index_writer, reject_file):
+	target_content, row_index_entries, rejected_content, number_of_rows, number_of_rejected_rows = converted_range
+	target_csv_file.write(target_content)
+	if row_index_writer:
+		for key, length in row_index_entries:
+			row_index_writer.append(key, length)
+	if rejected_content:
+		reject_file.write(rejected_content)
+	return number_of_rows + number_of_rejected_rows, number_of_rejected_rows
+
+def convert_to_columnar_file(
+		source_csv_file_path, 
+		target_file_path, 
+		source_row_delimiter, 
+		source_col_delimiter, 
+		target_row_delimiter,
+		target_col_delimiter,
+		quotation_delimiter,
+		buffer_size,
+		number_of_workers,
+		chunk_size,
+		target_file_format,
+		reject_file_path=None
+	):
+	# The rows are staged as UTF-8 CSV and typed once by pandas, so the columnar
+	# file holds exactly the dtypes the profiler would infer from the CSV.
+	import pandas as pd
+	if target_file_format not in ('parquet', 'feather'):
+		raise ValueError("Unknown target file format: '{}'".format(target_file_format))
+	staging_csv_file_path = target_file_path + '.csv.tmp'
+	convert_to_valid_csv(
+		source_csv_file_path, 
+		staging_csv_file_path, 
+		source_row_delimiter, 
+		source_col_delimiter, 
+		target_row_delimiter,
+		target_col_delimiter,
+		quotation_delimiter,
+		buffer_size=buffer_size,
+		number_of_workers=number_of_workers,
+		chunk_size=chunk_size,
+		target_encoding='utf-8',
+		target_file_format='csv',
+		index_file_path=None,
+		checkpoint_file_path=None,
+		reject_file_path=reject_file_path
+	)
+	try:
+		data_frame = pd.read_csv(staging_csv_file_path, encoding='utf-8', sep=target_col_delimiter)
+	finally:
+		os.remove(staging_csv_file_path)
+	if target_file_format == 'parquet':
+		data_frame.to_parquet(target_file_path)
+	else:
+		data_frame.to_feather(target_file_path)
+
+if __name__ == '__main__':
+	convert_to_valid_csv(
+		SOURCE_CSV_FILE_PATH, 
+		TARGET_CSV_FILE_PATH, 
+		SOURCE_ROW_DELIMITER, 
+		SOURCE_COL_DELIMITER, 
+		TARGET_ROW_DELIMITER,
+		TARGET_COL_DELIMITER,
+		QUOTATION_DELIMITER
+	)
 
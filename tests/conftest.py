@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Both packages are run as scripts from their own directory, their modules import each other without a package
+REPOSITORY_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for package_directory in ("Attribute Analysis", "CSV Converter"):
+    sys.path.insert(0, os.path.join(REPOSITORY_DIRECTORY, package_directory))
@@ -0,0 +1,95 @@
+import csv
+import pytest
+from csv_converter import convert_to_valid_csv
+
+
+SOURCE_ROW_DELIMITER = '<EOR>'
+SOURCE_COL_DELIMITER = '<EOC>'
+SOURCE_ROWS = [
+    ['FullId', 'TicketTitle', 'Beschreibung'],
+    ['INC000000', 'Drucker; kaputt', 'Zeile 1\nZeile 2'],
+    ['INC000001', '"quoted"', 'mit "Anführungszeichen" mittendrin'],
+    ['INC000002', '', 'Windows\r\nZeilenumbruch'],
+    ['INC000003', 'Passwort', ''],
+    ['INC000004', 'Zu viele', 'Spalten', 'hier'],
+    ['INC000005', 'VPN geht nicht', 'ÄÖÜ ß €'],
+] + [['INC{:06d}'.format(row_number), 'Titel {}'.format(row_number % 7), 'x' * (row_number % 13)]
+     for row_number in range(6, 60)]
+# The written files by name and their file path argument
+OUTPUT_FILE_ARGUMENTS = {
+    'target': 'target_csv_file_path', 'index': 'index_file_path', 'reject': 'reject_file_path'
+}
+
+
+def write_source_file(file_path, source_rows):
+    with open(file_path, 'w', encoding='utf16', newline='') as source_file:
+        source_file.write(''.join(
+            SOURCE_COL_DELIMITER.join(source_row) + SOURCE_ROW_DELIMITER for source_row in source_rows
+        ))
+
+
+def convert(source_file_path, target_directory, **arguments):
+    output_file_paths = {name: str(target_directory / (name + '.csv')) for name in OUTPUT_FILE_ARGUMENTS}
+    arguments.update((OUTPUT_FILE_ARGUMENTS[name], file_path) for name, file_path in output_file_paths.items())
+    convert_to_valid_csv(
+        str(source_file_path), source_row_delimiter=SOURCE_ROW_DELIMITER, source_col_delimiter=SOURCE_COL_DELIMITER,
+        target_row_delimiter='\n', target_col_delimiter=';', quotation_delimiter='""', **arguments
+    )
+    contents = {}
+    for name, file_path in output_file_paths.items():
+        with open(file_path, 'rb') as output_file:
+            contents[name] = output_file.read()
+    return contents
+
+
+@pytest.fixture
+def source_file_path(tmp_path):
+    source_file_path = tmp_path / 'source.csv'
+    write_source_file(source_file_path, SOURCE_ROWS)
+    return source_file_path
+
+
+@pytest.fixture
+def sequential_contents(source_file_path, tmp_path):
+    (tmp_path / 'sequential').mkdir()
+    return convert(source_file_path, tmp_path / 'sequential', buffer_size=None, number_of_workers=1)
+
+
+def test_sequential_conversion_is_valid_csv(sequential_contents):
+    target_rows = list(csv.reader(sequential_contents['target'].decode('utf16').splitlines(True), delimiter=';'))
+    expected_rows = [source_row for source_row in SOURCE_ROWS if len(source_row) == 3]
+    # The text mode reader translates line breaks inside values
+    assert target_rows == [[column.replace('\r\n', '\n') for column in row] for row in expected_rows]
+    assert 'INC000004' in sequential_contents['reject'].decode('utf16')
+
+
+def test_row_index_points_at_the_converted_rows(sequential_contents):
+    index_rows = list(csv.reader(sequential_contents['index'].decode('utf-8').splitlines(), delimiter=';'))
+    assert index_rows[0] == ['FullId', 'row', 'offset', 'length']
+    for key, row, offset, length in index_rows[1:]:
+        target_row = sequential_contents['target'][int(offset):int(offset) + int(length)].decode('utf-16-le')
+        assert target_row.startswith(key + ';')
+        assert target_row.endswith('\n')
+
+
+@pytest.mark.parametrize('buffer_size', [1, 4, 7, 64])
+def test_buffered_conversion_is_byte_identical(source_file_path, tmp_path, sequential_contents, buffer_size):
+    assert convert(source_file_path, tmp_path, buffer_size=buffer_size, number_of_workers=1) == sequential_contents
+
+
+@pytest.mark.parametrize('chunk_size', [1, 50, 333, 1024 * 1024])
+def test_parallel_conversion_is_byte_identical(source_file_path, tmp_path, sequential_contents, chunk_size):
+    assert convert(source_file_path, tmp_path, number_of_workers=2, chunk_size=chunk_size) == sequential_contents
+
+
+def test_incremental_conversion_is_byte_identical(source_file_path, tmp_path, sequential_contents):
+    checkpoint_file_path = str(tmp_path / 'checkpoint.json')
+    # The first run sees half of the rows and a record that is still being appended
+    write_source_file(source_file_path, SOURCE_ROWS[:30])
+    with open(source_file_path, 'a', encoding='utf-16-le', newline='') as source_file:
+        source_file.write(SOURCE_COL_DELIMITER.join(SOURCE_ROWS[30])[:5])
+    convert(source_file_path, tmp_path, number_of_workers=1, chunk_size=100, checkpoint_file_path=checkpoint_file_path)
+    write_source_file(source_file_path, SOURCE_ROWS)
+    assert convert(
+        source_file_path, tmp_path, number_of_workers=2, chunk_size=100, checkpoint_file_path=checkpoint_file_path
+    ) == sequential_contents
@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+from loaders import CSVDataFrameLoader, ParallelCSVDataFrameLoader, iterate_csv_row_ranges, split_into_csv_row_ranges
+
+
+CSV_CONTENT = "FullId;TicketTitle;Priority_de;Beschreibung\n" + "".join(
+    'INC{:06d};{};{};{}\n'.format(
+        row_number,
+        '"Drucker; kaputt {}"'.format(row_number) if row_number % 5 == 0 else "VPN geht nicht",
+        # Whole numbers in the first rows, missing values further down
+        "" if row_number > 150 and row_number % 9 == 0 else row_number % 4,
+        '"Zeile 1\nZeile ""2"""' if row_number % 7 == 0 else "x" * (row_number % 11)
+    )
+    for row_number in range(300)
+)
+# A quote inside an unquoted value is part of the value, it must not end or start a quoted one
+STRAY_QUOTE_CSV_CONTENT = "FullId;TicketTitle;Beschreibung\n" + "".join(
+    'INC{:06d};{};{}\n'.format(
+        row_number,
+        'Monitor 24" defekt' if row_number % 3 == 0 else '"Drucker; ""kaputt"""',
+        '"Zeile 1\nZeile 2"' if row_number % 4 == 0 else "x" * (row_number % 5)
+    )
+    for row_number in range(200)
+)
+
+
+@pytest.fixture(params=["utf-8", "utf-16"])
+def csv_file(tmp_path, request):
+    csv_file_path = tmp_path / "data.csv"
+    csv_file_path.write_bytes(CSV_CONTENT.encode(request.param))
+    return str(csv_file_path), request.param
+
+
+@pytest.mark.parametrize('columns', [None, ["FullId", "Priority_de"]])
+@pytest.mark.parametrize('chunk_size', [64, 1000])
+def test_parallel_load_equals_read_csv(csv_file, columns, chunk_size):
+    csv_file_path, encoding = csv_file
+    expected_data_frame = CSVDataFrameLoader(csv_file_path, "FullId", encoding, ";", columns).load()
+    data_frame = ParallelCSVDataFrameLoader(
+        csv_file_path, "FullId", encoding, ";", columns, number_of_workers=3, chunk_size=chunk_size
+    ).load()
+    pd.testing.assert_frame_equal(data_frame, expected_data_frame)
+
+
+@pytest.mark.parametrize('chunk_size', [30, 300])
+def test_parallel_load_with_stray_quotes_equals_read_csv(tmp_path, chunk_size):
+    csv_file_path = tmp_path / "data.csv"
+    csv_file_path.write_bytes(STRAY_QUOTE_CSV_CONTENT.encode("utf-8"))
+    expected_data_frame = CSVDataFrameLoader(str(csv_file_path), "FullId", "utf-8", ";").load()
+    data_frame = ParallelCSVDataFrameLoader(
+        str(csv_file_path), "FullId", "utf-8", ";", number_of_workers=3, chunk_size=chunk_size
+    ).load()
+    pd.testing.assert_frame_equal(data_frame, expected_data_frame)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 50, 777])
+def test_row_ranges_end_on_unquoted_line_breaks(tmp_path, chunk_size):
+    csv_file_path = tmp_path / "data.csv"
+    csv_file_path.write_bytes(CSV_CONTENT.encode("utf-8"))
+    row_ranges = split_into_csv_row_ranges(str(csv_file_path), 0, 'u1', chunk_size)
+    assert row_ranges[0][0] == 0 and row_ranges[-1][1] == len(CSV_CONTENT.encode("utf-8"))
+    content = CSV_CONTENT.encode("utf-8")
+    for (start, end), (next_start, _) in zip(row_ranges, row_ranges[1:]):
+        assert end == next_start
+        assert content[end - 1:end] == b"\n" and content[:end].count(b'"') % 2 == 0
+    # Blocks smaller than a range carry the number of quotes over
+    assert list(iterate_csv_row_ranges(str(csv_file_path), 0, 'u1', chunk_size, block_size=7)) == row_ranges
@@ -0,0 +1,182 @@
+import pytest
+from factories import AttributeAnalysisJSONFactory, ChunkedCSVProfilerSettingsFactory
+from loaders import CSVDataFrameLoader
+from sources import DataFrameDataSource, StateDataSource
+from states import read_partial_profile_states, write_partial_profile_state
+
+
+ATTRIBUTE_SETTINGS = [
+    {
+        'attribute_name': 'TicketTitle',
+        'dropna': False,
+        'indicators': [
+            {'indicator_name': 'NullValuesIndicator'},
+            {'indicator_name': 'DistinctValuesIndicator'},
+            {'indicator_name': 'ValueRangeIndicator'},
+            {'indicator_name': 'PatternFrequencyIndicator'}
+        ],
+        'business_rules': [{'business_rule_name': 'NotNullRule'}, {'business_rule_name': 'NoFoldingWhiteSpacesRule'}]
+    },
+    {
+        # Read as text per chunk, the numbers are typed like the in-memory parser does ("2" is 2.0 with nulls)
+        'attribute_name': 'Priority_de',
+        'dropna': False,
+        'indicators': [{'indicator_name': 'DistinctValuesIndicator'}, {'indicator_name': 'ValueRangeIndicator'}],
+        'business_rules': [
+            {'business_rule_name': 'RegExPatternMatchingRule', 'business_rule_config': {'pattern': '^[1-3]$', 'dropna': True}}
+        ]
+    },
+    {
+        'attribute_name': 'IB_Standort_Land',
+        'dropna': True,
+        'indicators': [
+            {'indicator_name': 'ShortestValuesIndicator', 'indicator_config': {'number_of_values': 5, 'dropna': True}}
+        ],
+        'business_rules': [
+            {'business_rule_name': 'TwoLetterCountryCodeDomainListMatchingRule', 'business_rule_config': {'dropna': True}}
+        ]
+    }
+]
+TITLES = ['VPN geht nicht', ' Drucker kaputt', '"Passwort; vergessen"', '', 'Outlook ', '"Zeile 1\nZeile 2"']
+COUNTRIES = ['DE', 'de', 'AT', '', 'XX', 'CH', 'D E']
+
+
+def create_csv_rows(get_priority=lambda row_number: '' if row_number % 11 == 0 else row_number * 3 % 5):
+    return ['FullId;TicketTitle;Priority_de;IB_Standort_Land\n'] + [
+        'INC{:06d};{};{};{}\n'.format(
+            row_number,
+            TITLES[row_number * 7 % len(TITLES)],
+            get_priority(row_number),
+            COUNTRIES[row_number * 5 % len(COUNTRIES)]
+        )
+        for row_number in range(400)
+    ]
+
+
+CSV_ROWS = create_csv_rows()
+# The unquoted title holds a quote that neither opens nor closes a quoted value
+STRAY_QUOTE_CSV_ROWS = CSV_ROWS[:1] + [
+    csv_row.replace(';VPN geht nicht;', ';Monitor 24" defekt;') for csv_row in CSV_ROWS[1:201]
+]
+
+
+def write_csv_file(csv_file_path, csv_rows):
+    with open(csv_file_path, 'w', encoding='utf-8', newline='') as csv_file:
+        csv_file.write(''.join(csv_rows))
+
+
+def create_chunked_csv_profiler_factory(csv_file_path, state_file_path=None, separator=';'):
+    return ChunkedCSVProfilerSettingsFactory(
+        str(csv_file_path), 'FullId', ATTRIBUTE_SETTINGS, 'utf-8', separator, 37, state_file_path
+    )
+
+
+def get_results(data_source):
+    """The results of all attribute analyses and the rows of every listed invalid value"""
+    results = []
+    for json_data in ATTRIBUTE_SETTINGS:
+        attribute_analysis = AttributeAnalysisJSONFactory(json_data, data_source).create()
+        attribute_analysis.run()
+        index_values = {
+            (business_rule, str(value)): list(attribute_analysis.get_index_values(value))
+            for business_rule, business_rule_results in attribute_analysis.business_rules_results['invalid'].items()
+            for value in business_rule_results.get('values', {})
+        }
+        results.append((attribute_analysis.get_result(), index_values))
+    return results
+
+
+@pytest.fixture
+def csv_file_path(tmp_path):
+    csv_file_path = tmp_path / 'data.csv'
+    write_csv_file(csv_file_path, CSV_ROWS)
+    return csv_file_path
+
+
+@pytest.fixture
+def in_memory_results(csv_file_path):
+    return get_results(DataFrameDataSource(CSVDataFrameLoader(str(csv_file_path), 'FullId').load()))
+
+
+def test_in_memory_results_list_invalid_values(in_memory_results):
+    assert all(index_values for _, index_values in in_memory_results)
+
+
+def test_chunked_profile_equals_in_memory(csv_file_path, in_memory_results):
+    profile_state = create_chunked_csv_profiler_factory(csv_file_path).create().profile()
+    assert get_results(StateDataSource(profile_state)) == in_memory_results
+
+
+def test_resumed_profile_equals_in_memory(csv_file_path, tmp_path, in_memory_results):
+    state_file_path = str(tmp_path / 'state.pickle')
+    write_csv_file(csv_file_path, CSV_ROWS[:150])
+    create_chunked_csv_profiler_factory(csv_file_path, state_file_path).create().profile()
+    write_csv_file(csv_file_path, CSV_ROWS)
+    profile_state = create_chunked_csv_profiler_factory(csv_file_path, state_file_path).create().profile()
+    assert get_results(StateDataSource(profile_state)) == in_memory_results
+
+
+@pytest.mark.parametrize('priorities, reads_all_rows', [
+    # "2" first appears in the appended rows, it is only invalid once typed (2.0)
+    ((['0', '', '4'], ['0', '', '4', '2']), False),
+    # The appended missing values turn the column from integers to floats, "2" of the first rows is then invalid
+    ((['0', '2', '4'], ['0', '2', '4', '']), True)
+])
+def test_resumed_profile_reads_all_rows_again_only_if_the_type_changes(
+        csv_file_path, tmp_path, monkeypatch, priorities, reads_all_rows):
+    first_priorities, appended_priorities = priorities
+    csv_rows = create_csv_rows(lambda row_number: (
+        first_priorities[row_number % len(first_priorities)] if row_number < 150
+        else appended_priorities[row_number % len(appended_priorities)]
+    ))
+    write_csv_file(csv_file_path, csv_rows)
+    in_memory_results = get_results(DataFrameDataSource(CSVDataFrameLoader(str(csv_file_path), 'FullId').load()))
+    state_file_path = str(tmp_path / 'state.pickle')
+    write_csv_file(csv_file_path, csv_rows[:151])
+    create_chunked_csv_profiler_factory(csv_file_path, state_file_path).create().profile()
+    write_csv_file(csv_file_path, csv_rows)
+    chunked_csv_profiler = create_chunked_csv_profiler_factory(csv_file_path, state_file_path).create()
+    read_all_chunks_calls = []
+    read_all_chunks = chunked_csv_profiler.read_all_chunks
+    monkeypatch.setattr(
+        chunked_csv_profiler, 'read_all_chunks', lambda: read_all_chunks_calls.append(1) or read_all_chunks()
+    )
+    profile_state = chunked_csv_profiler.profile()
+    assert get_results(StateDataSource(profile_state)) == in_memory_results
+    assert bool(read_all_chunks_calls) == reads_all_rows
+
+
+def profile_shards(csv_file_path, tmp_path, number_of_shards, separator=';'):
+    """Profiles every shard on its own and merges the partial results in reverse order"""
+    chunked_csv_profiler_factory = create_chunked_csv_profiler_factory(csv_file_path, separator=separator)
+    partial_result_file_paths = []
+    for shard_number in range(number_of_shards):
+        partial_result_file_path = str(tmp_path / 'shard{}.pickle'.format(shard_number))
+        write_partial_profile_state(
+            partial_result_file_path,
+            chunked_csv_profiler_factory.create().profile_shard(shard_number, number_of_shards),
+            shard_number, number_of_shards, chunked_csv_profiler_factory.get_state_key()
+        )
+        partial_result_file_paths.append(partial_result_file_path)
+    profile_state = read_partial_profile_states(
+        partial_result_file_paths[::-1], chunked_csv_profiler_factory.get_state_key()
+    )
+    chunked_csv_profiler_factory.create().add_missing_index_values(profile_state)
+    return profile_state
+
+
+@pytest.mark.parametrize('number_of_shards', [1, 3, 7])
+def test_merged_shards_equal_in_memory(csv_file_path, tmp_path, in_memory_results, number_of_shards):
+    profile_state = profile_shards(csv_file_path, tmp_path, number_of_shards)
+    assert get_results(StateDataSource(profile_state)) == in_memory_results
+
+
+@pytest.mark.parametrize('number_of_shards', [4, 11])
+@pytest.mark.parametrize('separator', [';', '|'])
+def test_merged_shards_with_stray_quotes_equal_in_memory(csv_file_path, tmp_path, separator, number_of_shards):
+    write_csv_file(csv_file_path, [csv_row.replace(';', separator) for csv_row in STRAY_QUOTE_CSV_ROWS])
+    in_memory_results = get_results(DataFrameDataSource(
+        CSVDataFrameLoader(str(csv_file_path), 'FullId', separator=separator).load()
+    ))
+    profile_state = profile_shards(csv_file_path, tmp_path, number_of_shards, separator)
+    assert get_results(StateDataSource(profile_state)) == in_memory_results